@@ -2,274 +2,495 @@
 import cv2  # OpenCV for webcam capture and image processing
 import numpy as np  # NumPy for numerical computations
 import time  # Time module for timing analysis duration
-from deepface import DeepFace  # DeepFace for emotion, age, and gender analysis
 import os  # OS module for file and directory operations
-import mediapipe as mp  # MediaPipe for facial landmark detection
-from scipy.spatial import distance  # SciPy for calculating Euclidean distances
-import subprocess  # Subprocess for system-level brightness control
+import subprocess  # Subprocess for installing missing packages
+import sys  # Sys module for command-line flags
+from frame_capture import LatestFrameSlot, CaptureThread, DROP_OLDEST, BLOCK  # Background frame capture
+from frame_sources import open_frame_source  # Webcam, video, image-directory and synthetic sources
+from emotion_worker import EmotionWorkerPool  # Background DeepFace analysis
+from inference_scheduler import AdaptiveInferenceScheduler  # Change-driven inference
+from facial_features import LandmarkFeatureExtractor, expression_vector  # Vectorised landmark features
+from session_store import (FrameRingBuffer, MOVEMENT_DTYPE, EXPRESSION_DTYPE,  # Columnar per-frame storage
+                           EMOTIONS, EMOTION_INDEX, SessionLog)
+from online_stats import (OnlineAnalysisAggregator, movement_pattern, add_conclusions,  # Live session summary
+                          POSITIVE_EMOTIONS, NEGATIVE_EMOTIONS)
+from brightness_control import BrightnessController, create_brightness_backend  # Cached brightness backends
+from brightness_transition import BrightnessTransitionEngine  # Background brightness fades
+from mood_decision import MoodDecisionLayer, MOOD_BRIGHTNESS  # Stable emotion -> brightness decisions
+from frame_sink import FrameWriter  # Background snapshot writer
+from frame_preview import PreviewPublisher, draw_overlay  # Overlay drawing and out-of-process preview
+from stage_timer import NULL_TIMER  # Per-stage latency spans (no-op unless a timer is passed in)
+from pipeline_metrics import MetricsRegistry, PrometheusEndpoint, JsonLinesReporter  # Live metrics export
+from face_crop import crop_face_tile  # Landmark-based face tiles for DeepFace
+from inference_config import InferencePlan, FRAME_ACTIONS, IDENTITY_ACTIONS  # Emotion per frame, age/gender per person
+from emotion_engines import EMOTION_ENGINES  # DeepFace or our own trained emotion model
+from startup import StartupProfiler, lazy_import, is_installed, warm_up_face_mesh, serve_sessions  # Cold-start handling
+
+# MediaPipe (and DeepFace, inside the workers) load only when the models are built
+mp = lazy_import("mediapipe")  # MediaPipe for facial landmark detection
 
 # Global variable to track current brightness level
 current_brightness = 70  # Initialize brightness at 70%
+# Brightness controller; outputs are discovered once when it is created
+brightness_controller = None
+# Background fade engine driving the controller toward a target setpoint
+brightness_engine = None
 
-def set_brightness(level):
-    """Set display brightness using xrandr (Linux)"""
-    global current_brightness
-    try:
-        # Get the active display name using xrandr
-        display = subprocess.check_output(
-            ["xrandr --verbose | grep -i connected | grep -v disconnected | awk '{print $1}'"], 
-            shell=True
-        ).decode().strip()
-        if display:
-            # Clamp brightness between 0.3 (minimum) and 1.0 (maximum)
-            brightness_level = max(0.3, min(1.0, level/100))
-            # Execute xrandr command to set brightness
-            subprocess.run(f"xrandr --output {display} --brightness {brightness_level:.2f}", shell=True)
-            # Update global brightness variable
-            current_brightness = level
-    except Exception as e:
-        # Print error if brightness control fails
-        print(f"Brightness control error: {str(e)}")
+def set_brightness(level, force=False):
+    """Set brightness through the cached backend (xrandr, sysfs backlight or simulated)"""
+    global current_brightness, brightness_controller
+    if brightness_controller is None:
+        brightness_controller = BrightnessController(create_brightness_backend(), initial_level=current_brightness)
+    # The controller caps the apply rate and reports its own errors
+    brightness_controller.set(level, force=force)
+    current_brightness = level
 
-def smooth_brightness_transition(target):
-    """Gradually adjust brightness to target level for smooth transitions"""
-    global current_brightness
-    step_size = 1  # Smaller step size (1%) for smoother transitions
-    delay = 0.005  # 5ms delay for faster but smooth adjustments
-    
-    # Continue adjusting until the difference is smaller than step size
-    while abs(current_brightness - target) > step_size:
-        if current_brightness < target:
-            # Increment brightness if below target
-            new_level = min(current_brightness + step_size, target)
-        else:
-            # Decrement brightness if above target
-            new_level = max(current_brightness - step_size, target)
-        
-        # Apply new brightness level
-        set_brightness(new_level)
-        # Short delay to control transition speed
-        time.sleep(delay)
-    
-    # Ensure exact target brightness is set
-    set_brightness(target)
+def smooth_brightness_transition(target, wait=False, fade_duration=0.6):
+    """Fade brightness to target on the background engine; a new target redirects the current fade"""
+    global brightness_engine
+    if brightness_engine is None:
+        brightness_engine = BrightnessTransitionEngine(
+            set_brightness,
+            initial_level=current_brightness,
+            fade_duration=fade_duration
+        )
+        brightness_engine.start()
+    brightness_engine.set_target(target)
+    if wait:
+        # Only used at start-up and shutdown, never inside the analysis loop
+        brightness_engine.wait_idle(timeout=fade_duration + 1.0)
 
-def analyze_facial_movement(duration=30):
+def record_expression(expression_data, frame_number, timestamp, analysis):
+    """Store one DeepFace result in the expression_data store"""
+    expression_data.append(
+        frame=frame_number,
+        time=timestamp,
+        emotion=EMOTION_INDEX[analysis['dominant_emotion']],
+        emotion_scores=[analysis['emotion'][emotion] for emotion in EMOTIONS],
+        age=analysis['age'],
+        gender=analysis['dominant_gender']
+    )
+
+def apply_emotion_brightness(mood_decision, emotion_scores):
+    """Adjust brightness when the smoothed mood settles on a new state; returns the new mood or None"""
+    mood = mood_decision.update(emotion_scores)
+    if mood is not None:
+        # Bright for positive, dim for negative, neutral otherwise
+        smooth_brightness_transition(MOOD_BRIGHTNESS[mood])
+    return mood
+
+def load_models(inference_workers=1, max_in_flight=2, stage_timer=NULL_TIMER, profiler=None,
+                inference_batch_size=1, inference_batch_wait_ms=20,
+                emotion_engine='deepface', emotion_model_path=None, compare_engine=None, compare_every=10):
+    """Build FaceMesh and the emotion workers and run each once, so no model loads inside a session"""
+    profiler = profiler or StartupProfiler()
+    with profiler.phase("import mediapipe"):
+        mp.load()
+    # Initialize MediaPipe Face Mesh for facial landmark detection
+    with profiler.phase("build FaceMesh"):
+        face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,  # Continuous video mode
+            max_num_faces=1,  # Detect only one face
+            refine_landmarks=True,  # Include iris landmarks for better accuracy
+            min_detection_confidence=0.6,  # Slightly higher confidence for robustness
+            min_tracking_confidence=0.6  # Higher tracking confidence
+        )
+    with profiler.phase("warm up FaceMesh"):
+        warm_up_face_mesh(face_mesh)
+    # Run DeepFace on worker threads so the loop keeps tracking landmarks meanwhile
+    if 'deepface' in (emotion_engine, compare_engine):
+        with profiler.phase("import deepface"):
+            lazy_import("deepface").load()
+    # Only request what the engine can answer (our own model does emotion only)
+    engine_actions = EMOTION_ENGINES[emotion_engine].actions
+    with profiler.phase(f"build + warm up {emotion_engine} engine"):
+        emotion_pool = EmotionWorkerPool(
+            actions=tuple(action for action in FRAME_ACTIONS + IDENTITY_ACTIONS if action in engine_actions),
+            workers=inference_workers,
+            max_in_flight=max_in_flight,
+            detector_backend='skip',  # FaceMesh already located the face, so send crops only
+            stage_timer=stage_timer,
+            # Tiles arriving within the wait window share one forward pass
+            batch_size=inference_batch_size,
+            batch_wait=inference_batch_wait_ms / 1000.0,
+            engine=emotion_engine,
+            model_path=emotion_model_path,
+            compare_with=compare_engine,  # e.g. keep DeepFace as the accuracy reference for our model
+            compare_every=compare_every
+        )
+        emotion_pool.warm_up()
+    return face_mesh, emotion_pool
+
+def analyze_facial_movement(duration=30, source=0, replay_realtime=False,
+                            drop_policy=None, frame_buffer_size=1,
+                            inference_workers=1, max_in_flight=2,
+                            inference_batch_size=1, inference_batch_wait_ms=20,
+                            emotion_engine='deepface', emotion_model_path=None,
+                            compare_engine=None, compare_every=10,
+                            change_threshold=0.05, max_staleness=2.0, face_tile_size=224,
+                            history_capacity=131072, spill_dir=None, session_log='session_log.bin',
+                            live_results_callback=None, live_report_interval=5.0,
+                            brightness_backend='auto', mood_min_dwell=3.0, mood_hysteresis=0.15,
+                            snapshot_dir='analysis_frames', snapshot_format='jpg', snapshot_quality=90,
+                            snapshot_queue_size=8, headless=False, preview_every=0, stage_timer=None,
+                            metrics_port=None, metrics_jsonl=None, metrics_interval=10.0,
+                            models=None):
     """Main function to analyze facial movements, expressions, and additional metrics"""
-    global current_brightness
+    global current_brightness, brightness_controller, brightness_engine
     
     # Print initialization message
     print("Initializing facial movement analysis with MediaPipe...")
-    
-    # Initialize MediaPipe Face Mesh for facial landmark detection
-    mp_face_mesh = mp.solutions.face_mesh
-    face_mesh = mp_face_mesh.FaceMesh(
-        static_image_mode=False,  # Continuous video mode
-        max_num_faces=1,  # Detect only one face
-        refine_landmarks=True,  # Include iris landmarks for better accuracy
-        min_detection_confidence=0.6,  # Slightly higher confidence for robustness
-        min_tracking_confidence=0.6  # Higher tracking confidence
-    )
-    
-    # Open webcam (default camera, index 0)
-    cap = cv2.VideoCapture(0)
+    # Stage timings go to the given StageTimer; the default no-op timer costs next to nothing
+    timer = stage_timer or NULL_TIMER
+    # Live metrics: a bounded in-process registry exported over localhost HTTP and/or JSON lines
+    metrics_exporters = []
+    if stage_timer is None and (metrics_port or metrics_jsonl):
+        timer = MetricsRegistry()
+        if metrics_port:
+            metrics_exporters.append(PrometheusEndpoint(timer, port=metrics_port))
+            print(f"Serving metrics on http://127.0.0.1:{metrics_port}/metrics")
+        if metrics_jsonl:
+            metrics_exporters.append(JsonLinesReporter(timer, metrics_jsonl, interval=metrics_interval))
+        for exporter in metrics_exporters:
+            exporter.start()
+    
+    # Models are built and warmed up before the session clock starts; a daemon passes in
+    # the (face_mesh, emotion_pool) it loaded once so repeated sessions skip this entirely
+    startup = StartupProfiler()
+    owns_models = models is None
+    if owns_models:
+        models = load_models(inference_workers, max_in_flight, stage_timer=timer, profiler=startup,
+                             inference_batch_size=inference_batch_size,
+                             inference_batch_wait_ms=inference_batch_wait_ms,
+                             emotion_engine=emotion_engine, emotion_model_path=emotion_model_path,
+                             compare_engine=compare_engine, compare_every=compare_every)
+    face_mesh, emotion_pool = models
+    emotion_pool.timer = timer
+    emotion_pool.reset_stats()
+    
+    # Open the frame source (default webcam at 640x480, 60 FPS; or a recording for replay)
+    with startup.phase("open frame source"):
+        cap = open_frame_source(source, realtime=replay_realtime)
     if not cap.isOpened():
-        # Exit if webcam cannot be opened
-        print("ERROR: Could not open webcam")
+        # Exit if the source cannot be opened
+        print(f"ERROR: Could not open frame source {source!r}")
+        if owns_models:
+            emotion_pool.shutdown()
         return None
     
-    # Set webcam resolution for faster processing
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    # Set higher frame rate for smoother capture
-    cap.set(cv2.CAP_PROP_FPS, 60)
+    # Capture frames on a dedicated thread so slow analysis never stalls the camera;
+    # recordings block instead of dropping so replays process every frame deterministically
+    if drop_policy is None:
+        drop_policy = DROP_OLDEST if cap.live else BLOCK
+    frame_slot = LatestFrameSlot(capacity=frame_buffer_size, drop_policy=drop_policy)
+    capture_thread = CaptureThread(cap, frame_slot, stage_timer=timer)
     
-    # Initialize timing and counters
-    start_time = time.time()
+    # Emotion runs on every inference; age and gender only for each new person
+    inference_plan = InferencePlan(
+        identity_actions=[action for action in IDENTITY_ACTIONS if action in emotion_pool.actions]
+    )
+    # Only re-run emotion analysis when the expression features actually drift
+    inference_scheduler = AdaptiveInferenceScheduler(
+        threshold=change_threshold,
+        max_staleness=max_staleness
+    )
+    
+    # Initialize counters
     frame_count = 0
-    movement_data = []  # Store movement metrics
-    expression_data = []  # Store expression metrics
-    last_landmarks = None  # Track previous frame's landmarks
+    # Fixed-size columnar stores keep memory constant; full history optionally spills to disk
+    if spill_dir:
+        os.makedirs(spill_dir, exist_ok=True)
+    movement_data = FrameRingBuffer(
+        MOVEMENT_DTYPE, history_capacity,
+        spill_path=os.path.join(spill_dir, "movement_data.bin") if spill_dir else None
+    )
+    expression_data = FrameRingBuffer(
+        EXPRESSION_DTYPE, history_capacity,
+        spill_path=os.path.join(spill_dir, "expression_data.bin") if spill_dir else None
+    )
+    feature_extractor = None  # Preallocated landmark buffers, created on the first frame
+    live_stats = OnlineAnalysisAggregator()  # Incremental summary available during the session
+    # Smooth emotion scores so only stable mood changes reach the lamp
+    mood_decision = MoodDecisionLayer(min_dwell=mood_min_dwell, hysteresis=mood_hysteresis)
     movement_intensity = 0  # Smoothed movement intensity
     blink_count = 0  # Track eye blinks
     head_tilt_data = []  # Track head tilt angles
-    
-    # Create directory for saving frames
-    os.makedirs("analysis_frames", exist_ok=True)
+    latest_analysis = None  # Most recent DeepFace result for the overlay
+    latest_analysis_frame = 0  # Frame number the brightness was last driven from
+    engine_compared = engine_agreed = 0  # Analyses cross-checked against the reference engine
+    
+    # Save frames on a writer thread so encoding and disk latency never stall the loop
+    frame_writer = FrameWriter(
+        snapshot_dir,
+        fmt=snapshot_format,
+        quality=snapshot_quality,
+        queue_size=snapshot_queue_size,
+        stage_timer=timer
+    )
+    frame_writer.start()
+    # Frame-exact labels for training: analysed frames' scores and saved snapshot paths
+    label_log = SessionLog(session_log) if session_log else None
+    
+    # Headless runs skip all drawing and the GUI event pump; an optional preview
+    # process can still show every Nth frame without rendering on this loop
+    preview = None
+    if preview_every:
+        preview = PreviewPublisher(every=preview_every)
+        preview.start()
+    
+    # Discover the brightness outputs once for the whole session
+    with startup.phase("brightness backend"):
+        brightness_controller = BrightnessController(
+            create_brightness_backend(brightness_backend),
+            initial_level=current_brightness,
+            stage_timer=timer
+        )
     
     # Set initial brightness to neutral
-    smooth_brightness_transition(70)
+    set_brightness(70, force=True)
+    startup.report()
     
     # Print analysis start message
     print(f"Starting analysis for {duration} seconds...")
     print("Please move your face naturally in front of the camera.")
+    # The session clock starts only now that every model and device is ready
+    start_time = time.time()
+    last_live_report = start_time  # When live results were last reported
+    capture_thread.start()
     
     while (time.time() - start_time) < duration:
-        # Read frame from webcam
-        ret, frame = cap.read()
-        if not ret:
-            # Exit if frame capture fails
-            print("ERROR: Failed to capture frame")
+        frame_start = time.perf_counter()
+        # Take the freshest frame from the capture thread
+        with timer.span('capture_wait'):
+            captured = frame_slot.get(timeout=1.0)
+        if captured is None:
+            if not frame_slot.closed:
+                # The capture thread is still running; a slow read (e.g. webcam warm-up) is not a failure
+                continue
+            # Recordings simply run out; a live camera stopping is an error
+            if cap.live:
+                print("ERROR: Failed to capture frame")
+            else:
+                print("Frame source finished.")
             break
+        _, captured_at, frame = captured
         
         # Increment frame counter
         frame_count += 1
         # Convert frame to RGB for MediaPipe processing
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with timer.span('bgr_to_rgb'):
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
         # Process frame with MediaPipe Face Mesh
-        results = face_mesh.process(rgb_frame)
+        with timer.span('facemesh'):
+            results = face_mesh.process(rgb_frame)
+        overlay_points = ()  # Landmark dots to draw
+        face_tile = None  # Aligned face crop, if one was made this frame
+        snapshot_tile = None  # Face tile to save as this frame's snapshot
+        overlay_lines = []  # (text, y) status lines to draw
         
         if results.multi_face_landmarks:
             # Get landmarks for the detected face
             face_landmarks = results.multi_face_landmarks[0]
-            # Convert landmarks to pixel coordinates
-            landmarks_np = np.array([(lm.x * frame.shape[1], lm.y * frame.shape[0]) 
-                                    for lm in face_landmarks.landmark])
+            # Fill the preallocated landmark buffer with pixel coordinates
+            if feature_extractor is None:
+                feature_extractor = LandmarkFeatureExtractor(frame.shape[1], frame.shape[0])
+            with timer.span('features'):
+                landmarks_np = feature_extractor.load(face_landmarks)
+                # Compute mouth, eyebrow, eye-ratio and head-tilt features in one pass
+                features = feature_extractor.features()
+            inference_plan.observe(landmarks_np)
             
-            if last_landmarks is not None:
+            if feature_extractor.has_previous:
                 # Calculate average movement (Euclidean distance) across landmarks
-                movement = np.mean(np.sqrt(np.sum((landmarks_np - last_landmarks) ** 2, axis=1)))
+                movement = feature_extractor.movement()
                 # Smooth movement intensity using exponential moving average
                 movement_intensity = 0.9 * movement_intensity + 0.1 * movement
                 
-                # Extract key facial landmarks
-                mouth_left = landmarks_np[61]  # Left corner of mouth
-                mouth_right = landmarks_np[291]  # Right corner of mouth
-                mouth_top = landmarks_np[13]  # Upper lip
-                mouth_bottom = landmarks_np[14]  # Lower lip
-                
-                # Calculate mouth dimensions
-                mouth_width = distance.euclidean(mouth_left, mouth_right)
-                mouth_height = distance.euclidean(mouth_top, mouth_bottom)
-                
-                # Calculate eyebrow positions
-                left_eyebrow = np.mean(landmarks_np[65:70], axis=0)
-                right_eyebrow = np.mean(landmarks_np[295:300], axis=0)
-                
-                # Detect eye closure (blinking) using eye aspect ratio
-                left_eye_top = landmarks_np[159]  # Top of left eye
-                left_eye_bottom = landmarks_np[145]  # Bottom of left eye
-                left_eye_left = landmarks_np[133]  # Left corner of left eye
-                left_eye_right = landmarks_np[33]  # Right corner of left eye
-                left_eye_height = distance.euclidean(left_eye_top, left_eye_bottom)
-                left_eye_width = distance.euclidean(left_eye_left, left_eye_right)
-                left_eye_ratio = left_eye_height / left_eye_width
-                
                 # Consider a blink if eye aspect ratio is low
-                if left_eye_ratio < 0.2:
+                if features['left_eye_ratio'] < 0.2:
                     blink_count += 1
-                
-                # Calculate head tilt using nose bridge and chin
-                nose_bridge = landmarks_np[1]  # Nose bridge
-                chin = landmarks_np[152]  # Chin
-                head_tilt = np.arctan2(chin[1] - nose_bridge[1], chin[0] - nose_bridge[0]) * 180 / np.pi
+                    live_stats.update_blink()
                 
                 # Store movement and facial metrics
-                movement_data.append({
-                    'frame': frame_count,
-                    'time': time.time() - start_time,
-                    'movement': movement,
-                    'mouth_width': mouth_width,
-                    'mouth_height': mouth_height,
-                    'eyebrow_pos': (left_eyebrow[1] + right_eyebrow[1]) / 2,
-                    'head_tilt': head_tilt
-                })
+                movement_data.append(
+                    frame=frame_count,
+                    time=time.time() - start_time,
+                    movement=movement,
+                    mouth_width=features['mouth_width'],
+                    mouth_height=features['mouth_height'],
+                    eyebrow_pos=features['eyebrow_pos'],
+                    head_tilt=features['head_tilt']
+                )
+                live_stats.update_movement(movement, features['head_tilt'])
             
-            # Update last landmarks for next iteration
-            last_landmarks = landmarks_np
+            # Submit a frame for emotion analysis when the expression has changed or gone stale
+            change_features = expression_vector(features)
+            if inference_scheduler.should_infer(change_features):
+                # Crop an aligned face tile from the BGR frame instead of sending the whole frame
+                with timer.span('face_crop'):
+                    face_tile = crop_face_tile(frame, landmarks_np, size=face_tile_size)
+                # Results are timestamped with the capture time of the analysed frame
+                actions = inference_plan.next_actions()
+                if emotion_pool.submit(frame_count, face_tile, captured_at - start_time, actions=actions):
+                    inference_scheduler.mark_inferred(change_features)
+                    inference_plan.submitted(frame_count, actions)
             
-            # Perform emotion analysis every 3 frames for better responsiveness
-            if frame_count % 3 == 0:
-                try:
-                    # Convert frame back to BGR for DeepFace
-                    bgr_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-                    # Analyze emotions, age, and gender
-                    analysis = DeepFace.analyze(
-                        bgr_frame, 
-                        actions=['emotion', 'age', 'gender'], 
-                        enforce_detection=False
-                    )
-                    
-                    # Handle case where analysis returns a list
-                    if isinstance(analysis, list):
-                        analysis = analysis[0]
-                    
-                    # Extract dominant emotion
-                    dominant_emotion = analysis['dominant_emotion']
-                    
-                    # Store expression data
-                    expression_data.append({
-                        'frame': frame_count,
-                        'time': time.time() - start_time,
-                        'emotion': dominant_emotion,
-                        'emotion_scores': analysis['emotion'],
-                        'age': analysis['age'],
-                        'gender': analysis['gender']
-                    })
-                    
-                    # Display emotion on frame
-                    cv2.putText(frame, f"Emotion: {dominant_emotion}", 
-                               (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    # Display age and gender
-                    cv2.putText(frame, f"Age: {analysis['age']}", 
-                               (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    cv2.putText(frame, f"Gender: {analysis['gender']}", 
-                               (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # Adjust brightness based on emotion
-                    if dominant_emotion in ['happy', 'surprise']:
-                        smooth_brightness_transition(100)  # Bright for positive emotions
-                    elif dominant_emotion in ['sad', 'fear', 'angry', 'disgust']:
-                        smooth_brightness_transition(30)   # Dim for negative emotions
-                    else:
-                        smooth_brightness_transition(70)   # Neutral brightness
-                    
-                except Exception as e:
-                    # Print error if expression analysis fails
-                    print(f"Expression analysis error: {str(e)}")
+            # Snapshots are the aligned face tile the emotion engines see (cut before the overlay is drawn),
+            # so a model trained on them gets the same input live
+            if frame_count % 20 == 0:
+                snapshot_tile = face_tile if face_tile is not None else crop_face_tile(
+                    frame, landmarks_np, size=face_tile_size)
             
-            # Draw facial landmarks on frame (first 50 for simplicity)
-            for landmark in face_landmarks.landmark[:50]:
-                x = int(landmark.x * frame.shape[1])
-                y = int(landmark.y * frame.shape[0])
-                cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
+            # Show the latest emotion, age and gender
+            if latest_analysis is not None:
+                overlay_lines.append((f"Emotion: {latest_analysis['dominant_emotion']}", 30))
+                if latest_analysis['dominant_gender']:
+                    overlay_lines.append((f"Age: {latest_analysis['age']:.0f}", 60))
+                    overlay_lines.append((f"Gender: {latest_analysis['dominant_gender']}", 90))
             
-            # Display movement intensity and blink count
-            cv2.putText(frame, f"Movement: {movement_intensity:.2f}", 
-                        (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(frame, f"Blinks: {blink_count}", 
-                        (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            # Show facial landmarks (first 50 for simplicity)
+            overlay_points = landmarks_np[:50]
+            
+            # Show movement intensity and blink count
+            overlay_lines.append((f"Movement: {movement_intensity:.2f}", 120))
+            overlay_lines.append((f"Blinks: {blink_count}", 150))
+        
+        # Merge finished emotion analyses into expression_data by frame number
+        for analysed_frame, analysed_time, analysis, error in emotion_pool.collect():
+            if error is not None:
+                # Print error if expression analysis fails
+                print(f"Expression analysis error: {str(error)}")
+                timer.inc('expression_errors')
+                inference_plan.failed(analysed_frame)
+                continue
+            # Emotion-only results carry the current person's age and gender forward
+            analysis = inference_plan.complete(analysis)
+            if 'reference_emotion' in analysis:
+                engine_compared += 1
+                engine_agreed += analysis['reference_emotion'] == analysis['dominant_emotion']
+            record_expression(expression_data, analysed_frame, analysed_time, analysis)
+            if label_log is not None:
+                label_log.log_analysis(analysed_frame, analysed_time, expression_data.last()['emotion_scores'])
+            live_stats.update_expression(analysis['dominant_emotion'], analysis['emotion'])
+            # Only the newest result may drive the lamp; late results are just recorded
+            if analysed_frame > latest_analysis_frame:
+                latest_analysis = analysis
+                latest_analysis_frame = analysed_frame
+                if apply_emotion_brightness(mood_decision, analysis['emotion']) is not None:
+                    # Face-to-lamp latency: frame capture until the new brightness target is set
+                    timer.record('face_to_lamp', time.time() - (start_time + analysed_time))
+                    timer.inc('mood_changes')
         
-        # Display the frame
-        cv2.imshow('Facial Movement Analysis', frame)
+        # Report the running mood summary without keeping raw history
+        if live_results_callback and time.time() - last_live_report >= live_report_interval:
+            last_live_report = time.time()
+            live_results_callback(live_stats.results(last_live_report - start_time))
         
-        # Save frame every 20 frames (reduced from 30 for more captures)
-        if frame_count % 20 == 0:
-            cv2.imwrite(f"analysis_frames/frame_{frame_count}.jpg", frame)
+        # Hand a reduced-rate copy to the preview process, which does its own drawing
+        if preview is not None:
+            preview.publish(frame_count, frame, overlay_points, overlay_lines)
+            if preview.quit_requested():
+                break
+        
+        # Draw the overlay and display the frame
+        if not headless:
+            with timer.span('overlay'):
+                draw_overlay(frame, overlay_points, overlay_lines)
+                cv2.imshow('Facial Movement Analysis', frame)
+        
+        # Save the face every 20 frames (reduced from 30 for more captures)
+        if snapshot_tile is not None:
+            snapshot_path = frame_writer.submit(frame_count, snapshot_tile)
+            if label_log is not None and snapshot_path is not None:
+                label_log.log_snapshot(frame_count, captured_at - start_time, snapshot_path)
         
         # Exit on 'q' key press
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        key_pressed = not headless and cv2.waitKey(1) & 0xFF == ord('q')
+        timer.record('frame', time.perf_counter() - frame_start)
+        if timer.enabled:
+            # Queue and drop gauges, only maintained when metrics are being collected
+            timer.inc('frames_processed')
+            timer.set_gauge('dropped_frames', frame_slot.dropped)
+            timer.set_gauge('inference_queue_depth', emotion_pool.in_flight())
+            timer.set_gauge('inference_rejected', emotion_pool.rejected)
+            timer.set_gauge('inference_batch_size', emotion_pool.mean_batch_size())
+            timer.set_gauge('snapshot_backpressure', frame_writer.backpressure())
+            timer.set_gauge('snapshots_dropped', frame_writer.dropped)
+        if key_pressed:
             break
     
-    # Release webcam and close windows
+    elapsed = time.time() - start_time  # Wall time actually spent in the loop
+    
+    # Stop the capture thread, release webcam and close windows
+    capture_thread.stop()
+    frame_writer.close()
+    # Keep analyses that were still running when the session ended
+    for analysed_frame, analysed_time, analysis, error in emotion_pool.collect(wait=True, timeout=5.0):
+        if error is None:
+            analysis = inference_plan.complete(analysis)
+            record_expression(expression_data, analysed_frame, analysed_time, analysis)
+            if label_log is not None:
+                label_log.log_analysis(analysed_frame, analysed_time, expression_data.last()['emotion_scores'])
+            live_stats.update_expression(analysis['dominant_emotion'], analysis['emotion'])
+    if owns_models:
+        emotion_pool.shutdown()
+    else:
+        # The pool outlives this session; analyses still running must not leak into the next one
+        emotion_pool.discard_pending()
+    # Write any records still only in memory to the spill files
+    movement_data.close()
+    expression_data.close()
+    if label_log is not None:
+        label_log.close()
     cap.release()
-    cv2.destroyAllWindows()
-    # Reset brightness to neutral
-    smooth_brightness_transition(70)
+    if preview is not None:
+        preview.close()
+    if not headless:
+        cv2.destroyAllWindows()
+    # Reset brightness to neutral and let the fade finish before shutting down
+    smooth_brightness_transition(70, wait=True)
+    brightness_engine.stop()
+    print(f"Snapshots written: {frame_writer.written}, dropped under backpressure: {frame_writer.dropped}.")
+    print(f"Brightness fades redirected mid-way: {brightness_engine.retargets}")
+    print(f"Mood changes sent to the lamp: {mood_decision.actuations}, suppressed: {mood_decision.suppressed()} "
+          f"({mood_decision.suppressed_hysteresis} by hysteresis, {mood_decision.suppressed_dwell} by dwell time).")
+    brightness_engine = None
+    print(f"Brightness backend '{brightness_controller.backend.name}': {brightness_controller.applied} writes, "
+          f"{brightness_controller.coalesced} steps coalesced by the rate cap.")
+    brightness_controller.close()
+    brightness_controller = None
+    for exporter in metrics_exporters:
+        exporter.close()
     
     # Print completion message
     print("\nAnalysis complete!")
     print(f"Processed {frame_count} frames in {duration} seconds.")
+    print(f"Analysis throughput: {frame_count / max(elapsed, 1e-6):.1f} frames/sec "
+          f"({'headless' if headless else 'with display'}).")
+    print(f"Captured {capture_thread.captured} frames, dropped {frame_slot.dropped} stale frames.")
+    print(f"Submitted {emotion_pool.submitted} frames for emotion analysis, skipped {emotion_pool.rejected} while busy "
+          f"(average batch {emotion_pool.mean_batch_size():.1f} frames).")
+    if engine_compared:
+        print(f"Emotion engine agreed with the reference on {engine_agreed}/{engine_compared} "
+              f"compared frames ({engine_agreed / engine_compared:.0%}).")
+    print(f"Age/gender analysed {inference_plan.identity_runs} times "
+          f"({inference_plan.identity.changes} faces seen); other analyses ran emotion only.")
+    print(f"Skipped {inference_scheduler.skipped()} unchanged frames "
+          f"({inference_scheduler.stale_fired} inferences forced by staleness).")
     
     # Process and return results
-    results = process_analysis_data(movement_data, expression_data, duration, blink_count)
+    if movement_data.covers_session() and expression_data.covers_session():
+        results = process_analysis_data(movement_data, expression_data, duration, blink_count)
+    else:
+        # The ring buffers wrapped without a spill file; the online aggregator saw every frame
+        results = live_stats.results(duration)
     return results
 
 def process_analysis_data(movement_data, expression_data, duration, blink_count):
-    """Processes raw analysis data into summary statistics"""
+    """Processes the columnar movement and expression stores (spill files included) into summary statistics"""
     results = {
-        'total_frames': len(movement_data),
+        'total_frames': movement_data.count,
         'duration': duration,
         'average_movement': 0,
         'movement_variance': 0,
@@ -285,72 +506,57 @@ def process_analysis_data(movement_data, expression_data, duration, blink_count)
     }
     
     # Return empty results if no data
-    if not movement_data or not expression_data:
+    if not len(movement_data) or not len(expression_data):
         return results
     
-    # Calculate movement statistics
-    movements = [m['movement'] for m in movement_data]
-    results['average_movement'] = np.mean(movements)
-    results['movement_variance'] = np.var(movements)
+    # A wrapped buffer without a spill file only holds the latest frames; say so instead of passing it off as the session
+    if not (movement_data.covers_session() and expression_data.covers_session()):
+        results['window_frames'] = len(movement_data)
+    
+    # Calculate movement statistics directly on the columns
+    movements = movement_data.history('movement')
+    results['average_movement'] = float(np.mean(movements, dtype=np.float64))
+    results['movement_variance'] = float(np.var(movements, dtype=np.float64))
     
     # Calculate average head tilt
-    head_tilts = [m['head_tilt'] for m in movement_data]
-    results['average_head_tilt'] = np.mean(head_tilts)
+    results['average_head_tilt'] = float(np.mean(movement_data.history('head_tilt'), dtype=np.float64))
     
     # Determine movement pattern based on normalized thresholds
-    if results['average_movement'] > 2.0:
-        results['movement_pattern'] = "high"
-    elif results['average_movement'] > 0.7:
-        results['movement_pattern'] = "moderate"
-    else:
-        results['movement_pattern'] = "low"
-    
-    # Process expression data
-    expression_counts = {}
-    last_expression = None
-    
-    for expr in expression_data:
-        emotion = expr['emotion']
-        # Count occurrences of each emotion
-        expression_counts[emotion] = expression_counts.get(emotion, 0) + 1
-        
-        # Categorize special expressions
-        if emotion in ['happy', 'surprise']:
-            results['smile_frames'] += 1
-        elif emotion in ['sad', 'fear', 'angry', 'disgust']:
-            results['sad_frames'] += 1
-            if expr['emotion_scores']['sad'] > 60:  # Higher threshold for crying
-                results['crying_frames'] += 1
-        
-        # Count expression changes
-        if last_expression and last_expression != emotion:
-            results['expression_changes'] += 1
-        last_expression = emotion
+    results['movement_pattern'] = movement_pattern(results['average_movement'])
     
-    results['expressions'] = expression_counts
+    # Process expression data in frame order (worker results can arrive out of order)
+    expressions = expression_data.history()
+    order = np.argsort(expressions['frame'], kind='stable')
+    emotions = expressions['emotion'][order]
+    sad_scores = expressions['emotion_scores'][order, EMOTION_INDEX['sad']]
+    analysed = len(emotions)
     
-    # Generate conclusions based on analysis
-    if results['smile_frames'] > len(expression_data) * 0.3:
-        results['conclusions'].append("The user was smiling frequently during the analysis.")
-    
-    if results['sad_frames'] > len(expression_data) * 0.3:
-        results['conclusions'].append("The user showed sadness or negative emotions frequently.")
-    
-    if results['crying_frames'] > len(expression_data) * 0.1:
-        results['conclusions'].append("The user may have been crying during the analysis.")
-    
-    if results['blink_count'] > duration * 0.3:
-        results['conclusions'].append("The user blinked frequently, possibly indicating fatigue or stress.")
+    # Count occurrences of each emotion
+    counts = np.bincount(emotions, minlength=len(EMOTIONS))
+    results['expressions'] = {EMOTIONS[i]: int(counts[i]) for i in np.unique(emotions)}
     
-    if results['movement_pattern'] == "high":
-        results['conclusions'].append("The user showed significant facial movement.")
-    elif results['movement_pattern'] == "low":
-        results['conclusions'].append("The user showed minimal facial movement.")
+    # Categorize special expressions
+    positive = np.isin(emotions, [EMOTION_INDEX[e] for e in POSITIVE_EMOTIONS])
+    negative = np.isin(emotions, [EMOTION_INDEX[e] for e in NEGATIVE_EMOTIONS])
+    results['smile_frames'] = int(np.count_nonzero(positive))
+    results['sad_frames'] = int(np.count_nonzero(negative))
+    results['crying_frames'] = int(np.count_nonzero(negative & (sad_scores > 60)))  # Higher threshold for crying
     
-    if abs(results['average_head_tilt']) > 15:
-        results['conclusions'].append("The user exhibited noticeable head tilting.")
+    # Count expression changes
+    results['expression_changes'] = int(np.count_nonzero(emotions[1:] != emotions[:-1]))
     
-    return results
+    # Generate conclusions based on analysis
+    return add_conclusions(results, analysed, duration)
+
+def print_live_results(results):
+    """One status line per live report: the recent mood and its share of the sliding window"""
+    recent = results['recent_expressions']
+    if not recent:
+        print(f"[{results['duration']:.0f} s] No emotion results yet")
+        return
+    share = recent[results['recent_mood']] / sum(recent.values())
+    print(f"[{results['duration']:.0f} s] Recent mood: {results['recent_mood']} ({share:.0%} of the last "
+          f"{sum(recent.values())} results), movement: {results['movement_pattern']}")
 
 def display_results(results):
     """Displays the analysis results in a readable format"""
@@ -362,6 +568,8 @@ def display_results(results):
     print("\n=== Facial Movement Analysis Results ===")
     print(f"Duration: {results['duration']} seconds")
     print(f"Total frames analyzed: {results['total_frames']}")
+    if 'window_frames' in results:
+        print(f"(statistics cover only the last {results['window_frames']} frames)")
     print(f"Average facial movement: {results['average_movement']:.2f} (variance: {results['movement_variance']:.2f})")
     print(f"Average head tilt: {results['average_head_tilt']:.2f} degrees")
     print(f"Movement pattern: {results['movement_pattern']}")
@@ -385,42 +593,87 @@ def display_results(results):
 
 if __name__ == "__main__":
     try:
-        # Check and install MediaPipe if missing
-        try:
-            import mediapipe
-        except ImportError:
+        # Check and install MediaPipe if missing (without importing it yet)
+        if not is_installed("mediapipe"):
             print("Installing MediaPipe...")
             subprocess.run(["pip3", "install", "mediapipe"], check=True)
-            import mediapipe
         
-        # Check and install DeepFace if missing
-        try:
-            import deepface
-        except ImportError:
+        # Check and install DeepFace if missing (its TensorFlow import is the slowest part of start-up)
+        if not is_installed("deepface"):
             print("Installing DeepFace...")
             subprocess.run(["pip3", "install", "deepface"], check=True)
-            import deepface
         
         # Run analysis for 30 seconds (increased duration)
-        print("Starting analysis...")
-        analysis_results = analyze_facial_movement(duration=30)
-        
-        # Display results
-        display_results(analysis_results)
+        # --headless skips all drawing and windows; --preview N shows every Nth frame in a separate process
+        headless = "--headless" in sys.argv
+        preview_every = int(sys.argv[sys.argv.index("--preview") + 1]) if "--preview" in sys.argv else 0
+        # --source accepts a camera index, video file, image directory or 'synthetic';
+        # --realtime replays recordings at their recorded FPS instead of as fast as possible
+        source = sys.argv[sys.argv.index("--source") + 1] if "--source" in sys.argv else 0
+        # --metrics-port N serves Prometheus text on localhost; --metrics-jsonl PATH appends JSON lines
+        metrics_port = int(sys.argv[sys.argv.index("--metrics-port") + 1]) if "--metrics-port" in sys.argv else None
+        metrics_jsonl = sys.argv[sys.argv.index("--metrics-jsonl") + 1] if "--metrics-jsonl" in sys.argv else None
+        # --batch N groups up to N face tiles arriving within --batch-wait-ms into one forward pass
+        batch_size = int(sys.argv[sys.argv.index("--batch") + 1]) if "--batch" in sys.argv else 1
+        batch_wait_ms = float(sys.argv[sys.argv.index("--batch-wait-ms") + 1]) if "--batch-wait-ms" in sys.argv else 20
+        # --engine own runs our trained Keras model, --engine tflite its quantized export (--model PATH);
+        # --compare-with deepface cross-checks every --compare-every Nth analysis against DeepFace
+        engine = sys.argv[sys.argv.index("--engine") + 1] if "--engine" in sys.argv else 'deepface'
+        model_path = sys.argv[sys.argv.index("--model") + 1] if "--model" in sys.argv else None
+        compare_with = sys.argv[sys.argv.index("--compare-with") + 1] if "--compare-with" in sys.argv else None
+        compare_every = int(sys.argv[sys.argv.index("--compare-every") + 1]) if "--compare-every" in sys.argv else 10
+        # --daemon loads the models once and then runs a session on every SIGUSR1
+        # (or every --daemon-interval seconds), so only the first session pays the cold start
+        daemon = "--daemon" in sys.argv
+        daemon_interval = float(sys.argv[sys.argv.index("--daemon-interval") + 1]) if "--daemon-interval" in sys.argv else None
+        # --live-report S prints the recent mood every S seconds while a session runs
+        live_report = float(sys.argv[sys.argv.index("--live-report") + 1]) if "--live-report" in sys.argv else None
         
-        # Save results to file
-        with open("analysis_results.txt", "w") as f:
-            f.write("Facial Movement Analysis Results\n")
-            f.write("="*40 + "\n")
-            for key, value in analysis_results.items():
-                if key == 'conclusions':
-                    f.write("\nConclusions:\n")
-                    for conclusion in value:
-                        f.write(f"- {conclusion}\n")
-                else:
-                    f.write(f"{key.replace('_', ' ').title()}: {value}\n")
+        def run_session(models=None):
+            print("Starting analysis...")
+            analysis_results = analyze_facial_movement(duration=30, source=source,
+                                                       replay_realtime="--realtime" in sys.argv,
+                                                       headless=headless, preview_every=preview_every,
+                                                       metrics_port=metrics_port, metrics_jsonl=metrics_jsonl,
+                                                       inference_batch_size=batch_size,
+                                                       inference_batch_wait_ms=batch_wait_ms,
+                                                       emotion_engine=engine, emotion_model_path=model_path,
+                                                       compare_engine=compare_with, compare_every=compare_every,
+                                                       live_results_callback=print_live_results if live_report else None,
+                                                       live_report_interval=live_report or 5.0,
+                                                       models=models)
+            if analysis_results is None:
+                return
+            
+            # Display results
+            display_results(analysis_results)
+            
+            # Save results to file
+            with open("analysis_results.txt", "w") as f:
+                f.write("Facial Movement Analysis Results\n")
+                f.write("="*40 + "\n")
+                for key, value in analysis_results.items():
+                    if key == 'conclusions':
+                        f.write("\nConclusions:\n")
+                        for conclusion in value:
+                            f.write(f"- {conclusion}\n")
+                    else:
+                        f.write(f"{key.replace('_', ' ').title()}: {value}\n")
+            
+            print("\nResults saved to 'analysis_results.txt'")
         
-        print("\nResults saved to 'analysis_results.txt'")
+        if daemon:
+            startup = StartupProfiler()
+            models = load_models(profiler=startup, inference_batch_size=batch_size,
+                                 inference_batch_wait_ms=batch_wait_ms,
+                                 emotion_engine=engine, emotion_model_path=model_path,
+                                 compare_engine=compare_with, compare_every=compare_every)
+            startup.report()
+            serve_sessions(lambda: run_session(models), interval=daemon_interval)
+            models[1].shutdown()
+            models[0].close()
+        else:
+            run_session()
         
     except Exception as e:
         # Print detailed error with traceback
@@ -428,5 +681,6 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
     finally:
-        # Wait for user input to exit
-        input("\nPress Enter to exit...")
\ No newline at end of file
+        # Wait for user input to exit (no one is there to press Enter on a headless controller)
+        if "--headless" not in sys.argv and "--daemon" not in sys.argv:
+            input("\nPress Enter to exit...")
\ No newline at end of file
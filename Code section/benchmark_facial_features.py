@@ -0,0 +1,103 @@
+# Import required libraries for the feature extraction micro-benchmark
+import time  # Time module for measuring per-frame cost
+import numpy as np  # NumPy for synthetic landmarks and the legacy path
+from scipy.spatial import distance  # SciPy, as used by the legacy per-frame code
+from facial_features import LandmarkFeatureExtractor  # Vectorised kernel under test
+
+FRAME_WIDTH = 640  # Webcam width used by the analysis scripts
+FRAME_HEIGHT = 480  # Webcam height used by the analysis scripts
+
+class _Landmark:
+    """Stand-in for a MediaPipe NormalizedLandmark"""
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+class _LandmarkList:
+    """Stand-in for a MediaPipe NormalizedLandmarkList"""
+
+    def __init__(self, points):
+        self.landmark = [_Landmark(float(x), float(y), 0.0) for x, y in points]
+
+def synthetic_faces(count, num_landmarks=478, seed=0):
+    """Generate jittered landmark lists that look like a face drifting slightly between frames"""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.3, 0.7, size=(num_landmarks, 2))
+    return [_LandmarkList(base + rng.normal(0, 0.002, size=base.shape)) for _ in range(count)]
+
+def legacy_features(face_landmarks, last_landmarks):
+    """Per-frame feature code as it was written in analyze_facial_movement"""
+    landmarks_np = np.array([(lm.x * FRAME_WIDTH, lm.y * FRAME_HEIGHT)
+                            for lm in face_landmarks.landmark])
+    result = None
+    if last_landmarks is not None:
+        movement = np.mean(np.sqrt(np.sum((landmarks_np - last_landmarks) ** 2, axis=1)))
+        mouth_width = distance.euclidean(landmarks_np[61], landmarks_np[291])
+        mouth_height = distance.euclidean(landmarks_np[13], landmarks_np[14])
+        left_eyebrow = np.mean(landmarks_np[65:70], axis=0)
+        right_eyebrow = np.mean(landmarks_np[295:300], axis=0)
+        left_eye_height = distance.euclidean(landmarks_np[159], landmarks_np[145])
+        left_eye_width = distance.euclidean(landmarks_np[133], landmarks_np[33])
+        nose_bridge = landmarks_np[1]
+        chin = landmarks_np[152]
+        result = {
+            'movement': movement,
+            'mouth_width': mouth_width,
+            'mouth_height': mouth_height,
+            'eyebrow_pos': (left_eyebrow[1] + right_eyebrow[1]) / 2,
+            'left_eye_ratio': left_eye_height / left_eye_width,
+            'head_tilt': np.arctan2(chin[1] - nose_bridge[1], chin[0] - nose_bridge[0]) * 180 / np.pi
+        }
+    return landmarks_np, result
+
+def run_legacy(faces):
+    """Time the legacy path over all faces and return seconds per frame"""
+    last_landmarks = None
+    start = time.perf_counter()
+    for face in faces:
+        last_landmarks, _ = legacy_features(face, last_landmarks)
+    return (time.perf_counter() - start) / len(faces)
+
+def run_vectorised(faces):
+    """Time the vectorised extractor over all faces and return seconds per frame"""
+    extractor = LandmarkFeatureExtractor(FRAME_WIDTH, FRAME_HEIGHT)
+    start = time.perf_counter()
+    for face in faces:
+        extractor.load(face)
+        features = extractor.features()
+        if extractor.has_previous:
+            features['movement'] = extractor.movement()
+    return (time.perf_counter() - start) / len(faces)
+
+def check_agreement(faces):
+    """Largest absolute difference between legacy and vectorised features"""
+    extractor = LandmarkFeatureExtractor(FRAME_WIDTH, FRAME_HEIGHT)
+    last_landmarks = None
+    worst = 0.0
+    for face in faces:
+        last_landmarks, legacy = legacy_features(face, last_landmarks)
+        extractor.load(face)
+        features = extractor.features()
+        if legacy is None:
+            continue
+        features['movement'] = extractor.movement()
+        for key, value in legacy.items():
+            worst = max(worst, abs(float(value) - features[key]))
+    return worst
+
+if __name__ == "__main__":
+    faces = synthetic_faces(2000)
+    # Warm up both paths before timing
+    run_legacy(faces[:50])
+    run_vectorised(faces[:50])
+
+    legacy_cost = run_legacy(faces)
+    vectorised_cost = run_vectorised(faces)
+
+    print("=== Landmark Feature Extraction Benchmark ===")
+    print(f"Frames: {len(faces)}")
+    print(f"Legacy per-frame cost: {legacy_cost * 1e6:.1f} us")
+    print(f"Vectorised per-frame cost: {vectorised_cost * 1e6:.1f} us")
+    print(f"Speed-up: {legacy_cost / vectorised_cost:.2f}x")
+    print(f"Max feature difference: {check_agreement(faces[:200]):.4f}")
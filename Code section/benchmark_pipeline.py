@@ -0,0 +1,119 @@
+# Import required libraries for the end-to-end pipeline benchmark
+import argparse  # Argparse for command-line options
+import importlib.util  # Importlib to load analysis scripts whose file names contain spaces
+import inspect  # Inspect to check which options a script variant supports
+import json  # JSON for machine-readable reports
+import os  # OS module for paths
+import platform  # Platform details recorded with each report
+import tempfile  # Throwaway snapshot directory for benchmark runs
+import time  # Time module for wall-clock measurement
+from stage_timer import StageTimer  # Per-stage latency collection
+
+DEFAULT_SCRIPT = "adjusting the brightness according to expression Ubuntu version updated 2.py"
+
+# Stages reported in pipeline order (others are appended after these)
+STAGE_ORDER = ['capture', 'capture_wait', 'bgr_to_rgb', 'facemesh', 'features', 'face_crop',
+               'deepface', 'overlay', 'imwrite', 'brightness', 'frame', 'face_to_lamp']
+
+def load_pipeline(script_path):
+    """Import an analysis script as a module without running its __main__ block"""
+    spec = importlib.util.spec_from_file_location("pipeline_under_test", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_benchmark(script_path, source, realtime=False, headless=True, duration=3600):
+    """Run analyze_facial_movement on a recording and return the benchmark report dict"""
+    module = load_pipeline(script_path)
+    parameters = inspect.signature(module.analyze_facial_movement).parameters
+    if 'stage_timer' not in parameters:
+        raise ValueError(f"{os.path.basename(script_path)} does not support stage timing")
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="moodsync_benchmark_") as snapshot_dir:
+        # Replays must not overwrite real snapshots or add sessions to the training log
+        isolation = {}
+        if 'snapshot_dir' in parameters:
+            isolation['snapshot_dir'] = snapshot_dir
+        if 'session_log' in parameters:
+            isolation['session_log'] = None
+        start = time.perf_counter()
+        # Simulated brightness keeps the run reproducible and off the real display
+        results = module.analyze_facial_movement(
+            duration=duration,
+            source=source,
+            replay_realtime=realtime,
+            headless=headless,
+            brightness_backend='simulated',
+            stage_timer=timer,
+            **isolation
+        )
+        wall_seconds = time.perf_counter() - start
+
+    stages = timer.summary()
+    ordered = {name: stages[name] for name in STAGE_ORDER if name in stages}
+    ordered.update({name: value for name, value in stages.items() if name not in ordered})
+    frame_stats = stages.get('frame', {'count': 0, 'total_s': 0.0})
+    return {
+        'script': os.path.basename(script_path),
+        'source': str(source),
+        'realtime': realtime,
+        'headless': headless,
+        'frames': frame_stats['count'],
+        'loop_seconds': frame_stats['total_s'],
+        'wall_seconds': wall_seconds,
+        'fps': frame_stats['count'] / frame_stats['total_s'] if frame_stats['total_s'] else 0.0,
+        'face_frames': results['total_frames'] if results else 0,
+        'stages': ordered,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def print_report(report):
+    """Print a benchmark report as a table"""
+    print(f"\n=== Pipeline Benchmark: {report['script']} on {report['source']} ===")
+    print(f"Frames: {report['frames']}  FPS: {report['fps']:.1f}  Wall time: {report['wall_seconds']:.1f} s")
+    print(f"{'stage':<14}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<14}{stats['count']:>8}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+def compare_reports(baseline, current):
+    """Print FPS and per-stage p50/p95 changes between two reports"""
+    print(f"\n=== {baseline['script']} -> {current['script']} ===")
+    fps_change = (current['fps'] / baseline['fps'] - 1) * 100 if baseline['fps'] else 0.0
+    print(f"FPS: {baseline['fps']:.1f} -> {current['fps']:.1f} ({fps_change:+.1f}%)")
+    for stage in current['stages']:
+        if stage not in baseline['stages']:
+            continue
+        before, after = baseline['stages'][stage], current['stages'][stage]
+        print(f"{stage:<14} p50 {before['p50_ms']:8.2f} -> {after['p50_ms']:8.2f} ms   "
+              f"p95 {before['p95_ms']:8.2f} -> {after['p95_ms']:8.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the facial analysis pipeline on recorded clips")
+    parser.add_argument("sources", nargs="+", help="video files, image directories or 'synthetic'")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="analysis script variant to benchmark")
+    parser.add_argument("--realtime", action="store_true", help="replay at recorded FPS instead of flat out")
+    parser.add_argument("--display", action="store_true", help="include overlay drawing and imshow")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON report path")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    reports = []
+    for source in args.sources:
+        report = run_benchmark(args.script, source, realtime=args.realtime, headless=not args.display)
+        print_report(report)
+        reports.append(report)
+
+    with open(args.output, "w") as f:
+        json.dump(reports, f, indent=2)
+    print(f"\nReport saved to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_reports = {report['source']: report for report in json.load(f)}
+        for report in reports:
+            if report['source'] in baseline_reports:
+                compare_reports(baseline_reports[report['source']], report)
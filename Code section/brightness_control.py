@@ -0,0 +1,148 @@
+# Import required libraries for display/lamp brightness control
+import os  # OS module for sysfs paths and environment checks
+import shutil  # Shutil to locate the xrandr binary
+import subprocess  # Subprocess for output discovery and the persistent shell
+import time  # Time module for the apply-rate cap
+from stage_timer import NULL_TIMER  # Optional actuation latency spans
+
+BACKLIGHT_DIR = "/sys/class/backlight"  # Kernel backlight devices
+
+def discover_xrandr_outputs():
+    """Return the names of all connected xrandr outputs (queried once)"""
+    query = subprocess.run(["xrandr", "--query"], capture_output=True, text=True, check=True).stdout
+    # Lines look like "eDP-1 connected primary 1920x1080+0+0 ..."
+    return [line.split()[0] for line in query.splitlines()
+            if " connected" in line and not line.startswith(" ")]
+
+class XrandrBackend:
+    """Software brightness through xrandr, driven by one long-lived shell instead of a fork per step"""
+
+    name = "xrandr"
+
+    def __init__(self, outputs=None, min_level=0.3):
+        self.outputs = outputs or discover_xrandr_outputs()  # Cached output names
+        if not self.outputs:
+            raise RuntimeError("No connected xrandr outputs found")
+        self.min_level = min_level  # xrandr can black the screen, so keep a floor
+        # Commands are written to this shell's stdin; Python never forks per brightness step
+        self.shell = subprocess.Popen(["/bin/sh"], stdin=subprocess.PIPE, text=True)
+
+    def apply(self, level):
+        """Set brightness on every cached output (level in 0-100)"""
+        brightness_level = max(self.min_level, min(1.0, level / 100))
+        args = " ".join(f"--output {output} --brightness {brightness_level:.2f}" for output in self.outputs)
+        self.shell.stdin.write(f"xrandr {args}\n")
+        self.shell.stdin.flush()
+
+    def close(self):
+        if self.shell.poll() is None:
+            self.shell.stdin.close()
+            self.shell.wait(timeout=2.0)
+
+class SysfsBacklightBackend:
+    """Hardware backlight through /sys/class/backlight, keeping the brightness file open"""
+
+    name = "sysfs"
+
+    def __init__(self, device=None):
+        devices = sorted(os.listdir(BACKLIGHT_DIR)) if os.path.isdir(BACKLIGHT_DIR) else []
+        if device is None:
+            if not devices:
+                raise RuntimeError("No backlight device found")
+            device = devices[0]
+        self.device_dir = os.path.join(BACKLIGHT_DIR, device)
+        with open(os.path.join(self.device_dir, "max_brightness")) as f:
+            self.max_brightness = int(f.read().strip())
+        self.file = open(os.path.join(self.device_dir, "brightness"), "w")
+
+    def apply(self, level):
+        """Write the raw backlight value for a 0-100 level"""
+        raw = round(max(0.0, min(100.0, level)) / 100 * self.max_brightness)
+        self.file.seek(0)
+        self.file.write(str(raw))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SimulatedBackend:
+    """No-op backend that records every applied level, for tests and headless runs"""
+
+    name = "simulated"
+
+    def __init__(self):
+        self.levels = []  # Every level applied, in order
+
+    def apply(self, level):
+        self.levels.append(level)
+
+    def close(self):
+        pass
+
+def create_brightness_backend(name="auto"):
+    """Build a backend by name; 'auto' prefers sysfs, then xrandr, then the simulator"""
+    if name == "sysfs":
+        return SysfsBacklightBackend()
+    if name == "xrandr":
+        return XrandrBackend()
+    if name == "simulated":
+        return SimulatedBackend()
+    if name != "auto":
+        raise ValueError(f"Unknown brightness backend: {name}")
+    try:
+        backend = SysfsBacklightBackend()
+        if os.access(os.path.join(backend.device_dir, "brightness"), os.W_OK):
+            return backend
+        backend.close()
+    except (OSError, RuntimeError, ValueError):
+        pass
+    if os.environ.get("DISPLAY") and shutil.which("xrandr"):
+        try:
+            return XrandrBackend()
+        except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+            print(f"Brightness control error: {str(e)}")
+    return SimulatedBackend()
+
+class BrightnessController:
+    """Applies brightness levels through a backend while capping how often it is touched"""
+
+    def __init__(self, backend, max_rate=30.0, initial_level=70, stage_timer=NULL_TIMER):
+        self.backend = backend
+        self.timer = stage_timer  # Records time spent in backend writes
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0  # Seconds between applies
+        self.level = initial_level  # Last requested level
+        self.applied_level = None  # Last level actually sent to the backend
+        self.last_apply = 0.0  # When the backend was last touched
+        self.applied = 0  # Backend writes performed
+        self.coalesced = 0  # Requests skipped by the rate cap
+
+    def set(self, level, force=False):
+        """Request a level; returns True if it reached the backend now"""
+        self.level = level
+        now = time.monotonic()
+        if level == self.applied_level:
+            return False
+        if not force and now - self.last_apply < self.min_interval:
+            # Too soon after the last write; a later request or flush() will carry it
+            self.coalesced += 1
+            return False
+        try:
+            with self.timer.span('brightness'):
+                self.backend.apply(level)
+        except Exception as e:
+            # Print error if brightness control fails
+            print(f"Brightness control error: {str(e)}")
+            return False
+        self.applied_level = level
+        self.last_apply = now
+        self.applied += 1
+        self.timer.inc('brightness_writes')
+        return True
+
+    def flush(self):
+        """Make sure the latest requested level has been applied"""
+        return self.set(self.level, force=True)
+
+    def close(self):
+        self.flush()
+        self.backend.close()
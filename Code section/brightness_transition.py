@@ -0,0 +1,88 @@
+# Import required libraries for background brightness fades
+import threading  # Threading for the transition engine
+import time  # Time module for time-based easing
+
+def linear(t):
+    """Constant-speed fade"""
+    return t
+
+def ease_in_out(t):
+    """Smoothstep: slow start, fast middle, slow finish"""
+    return t * t * (3 - 2 * t)
+
+def ease_out_cubic(t):
+    """Fast start that settles gently on the target"""
+    return 1 - (1 - t) ** 3
+
+EASINGS = {'linear': linear, 'ease-in-out': ease_in_out, 'ease-out': ease_out_cubic}
+
+class BrightnessTransitionEngine(threading.Thread):
+    """Fades brightness toward a target setpoint on its own thread so callers never block"""
+
+    def __init__(self, apply, initial_level=70, fade_duration=0.6, easing='ease-in-out', tick=1 / 60):
+        super().__init__(name="brightness-transition", daemon=True)
+        self.apply = apply  # Callable(level, force) that writes a brightness level
+        self.fade_duration = fade_duration  # Seconds for one fade, whatever its size
+        self.easing = EASINGS[easing] if isinstance(easing, str) else easing
+        self.tick = tick  # Seconds between fade updates
+        self.level = float(initial_level)  # Level currently shown
+        self.start_level = self.level  # Level the current fade started from
+        self.target = self.level  # Setpoint being faded toward
+        self.start_time = 0.0  # When the current fade started
+        self.retargets = 0  # Fades redirected before finishing
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.idle = threading.Event()  # Set when no fade is in progress
+        self.idle.set()
+        self.running = True
+
+    def set_target(self, target):
+        """Fade to a new target, starting from wherever the current fade has got to"""
+        with self.lock:
+            if target == self.target:
+                return
+            if not self.idle.is_set():
+                self.retargets += 1
+            self.start_level = self.level
+            self.target = float(target)
+            self.start_time = time.monotonic()
+            self.idle.clear()
+            self.wakeup.notify()
+
+    def run(self):
+        while True:
+            with self.lock:
+                # Sleep until there is a fade to run
+                while self.running and self.idle.is_set():
+                    self.wakeup.wait()
+                if not self.running:
+                    return
+                progress = (time.monotonic() - self.start_time) / self.fade_duration
+                if progress >= 1.0:
+                    self.level = self.target
+                    finished = True
+                else:
+                    self.level = self.start_level + (self.target - self.start_level) * self.easing(progress)
+                    finished = False
+                level = self.level
+            # Write outside the lock so set_target never waits on the backend
+            self.apply(round(level), finished)
+            if finished:
+                with self.lock:
+                    # Only go idle if no new target arrived while applying
+                    if self.level == self.target:
+                        self.idle.set()
+            else:
+                time.sleep(self.tick)
+
+    def wait_idle(self, timeout=None):
+        """Block until the current fade has reached its target"""
+        return self.idle.wait(timeout)
+
+    def stop(self):
+        """Stop the engine thread (the last applied level stays in place)"""
+        with self.lock:
+            self.running = False
+            self.wakeup.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=2.0)
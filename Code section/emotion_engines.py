@@ -0,0 +1,201 @@
+# Import required libraries for pluggable emotion engines
+import json  # JSON for the trained model's label order
+import os  # OS module for model paths
+import threading  # Lock guarding the lazy model load
+import cv2  # OpenCV for input preprocessing
+import numpy as np  # NumPy for scores
+from inference_config import DeepFaceModelCache, EMOTION_LABELS  # DeepFace models run directly on face tiles
+
+# Model written by "ai model/train_emotion_model.py" and the class order it was trained with
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai model")
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, "emotion_model_best.h5")
+# Quantized export written by "ai model/export_emotion_model.py"
+DEFAULT_TFLITE_PATH = os.path.join(MODEL_DIR, "emotion_model_int8.tflite")
+LABELS_FILE = "emotion_model_labels.json"
+
+def as_float32(model):
+    """Rebuild a model trained under mixed precision with float32 layers (same weights), like the exporter does"""
+    if all(layer.compute_dtype == 'float32' for layer in model.layers):
+        return model
+    # Without native bf16 (most lamp hubs) mixed-precision layers would run emulated and slowly
+    config = model.get_config()
+    for layer in config['layers']:
+        layer['config']['dtype'] = 'float32'
+    float_model = type(model).from_config(config)
+    float_model.set_weights(model.get_weights())
+    return float_model
+
+class DeepFaceEngine(DeepFaceModelCache):
+    """DeepFace's emotion, age and gender models (the accurate, heavier engine)"""
+
+    name = 'deepface'
+    actions = ('emotion', 'age', 'gender')
+
+class TrainedEmotionEngine:
+    """Our own CNN from train_emotion_model.py, run on the FaceMesh face tile (emotion only)"""
+
+    name = 'own'
+    actions = ('emotion',)
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, labels_path=None):
+        self.model_path = model_path
+        # Keras flow_from_directory orders classes alphabetically; the trainer saves that order
+        self.labels_path = labels_path or os.path.join(os.path.dirname(model_path), LABELS_FILE)
+        self.model = None
+        self.input_shape = None  # (height, width, channels) the model expects
+        self.labels = None
+        self.lock = threading.Lock()
+
+    def preload(self, actions=('emotion',)):
+        """Load the model and its label order"""
+        with self.lock:
+            if self.model is not None:
+                return
+            if os.path.exists(self.labels_path):
+                with open(self.labels_path) as f:
+                    class_indices = json.load(f)
+                self.labels = sorted(class_indices, key=class_indices.get)
+            else:
+                self.labels = sorted(EMOTION_LABELS)
+            self.load_model()
+
+    def load_model(self):
+        from tensorflow import keras  # Imported here so other engines never load TensorFlow
+        self.model = as_float32(keras.models.load_model(self.model_path, compile=False))
+        self.input_shape = tuple(self.model.input_shape[1:])
+
+    def predict(self, batch):
+        """Class probabilities for a preprocessed batch"""
+        return self.model.predict_on_batch(batch)
+
+    def prepare(self, tile):
+        """Resize a BGR face tile to the model's input (48x48 grayscale for FER-style models) in [0, 1]"""
+        height, width, channels = self.input_shape
+        if channels == 1:
+            image = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY)[..., None]
+        else:
+            # The trainer loads images as RGB
+            image = cv2.cvtColor(tile, cv2.COLOR_BGR2RGB)
+        resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        return resized.reshape(height, width, channels).astype(np.float32) / 255.0
+
+    def analyze(self, tile, actions=('emotion',)):
+        """DeepFace-style result for one BGR face tile"""
+        return self.analyze_batch([tile], [actions])[0]
+
+    def analyze_batch(self, tiles, actions):
+        """DeepFace-style results for several face tiles in one forward pass"""
+        if self.model is None:
+            self.preload()
+        scores = np.asarray(self.predict(np.stack([self.prepare(tile) for tile in tiles]))) * 100.0
+        analyses = []
+        for row in scores:
+            # Report every DeepFace label so downstream code sees the same keys from both engines
+            emotion = dict.fromkeys(EMOTION_LABELS, 0.0)
+            emotion.update({label: float(score) for label, score in zip(self.labels, row)})
+            analyses.append({'emotion': emotion, 'dominant_emotion': self.labels[int(np.argmax(row))]})
+        return analyses
+
+def _load_interpreter(model_path):
+    """Open a TFLite model with the slimmest interpreter installed"""
+    try:
+        from tflite_runtime.interpreter import Interpreter  # A few MB, no TensorFlow
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter  # Newer name of the standalone runtime
+        except ImportError:
+            import tensorflow as tf  # Full TensorFlow as a last resort
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path, num_threads=1)
+
+def _integer_range(dtype):
+    info = np.iinfo(dtype)
+    return info.min, info.max
+
+def quantize_input(batch, detail):
+    """Scale float inputs to the tensor's integer type (no-op for float models)"""
+    scale, zero_point = detail['quantization']
+    if scale:
+        batch = np.clip(np.round(batch / scale + zero_point), *_integer_range(detail['dtype']))
+    return batch.astype(detail['dtype'])
+
+def dequantize_output(values, detail):
+    """Turn integer outputs back into floats (no-op for float models)"""
+    scale, zero_point = detail['quantization']
+    if scale:
+        return (values.astype(np.float32) - zero_point) * scale
+    return values
+
+class TFLiteEmotionEngine(TrainedEmotionEngine):
+    """Our trained CNN exported to (quantized) TFLite, run with the standalone interpreter"""
+
+    name = 'tflite'
+
+    def __init__(self, model_path=DEFAULT_TFLITE_PATH, labels_path=None):
+        super().__init__(model_path, labels_path)
+        self.batch_size = 1  # Batch size the interpreter's tensors are allocated for
+
+    def load_model(self):
+        self.model = _load_interpreter(self.model_path)
+        self.model.allocate_tensors()
+        self.input_detail = self.model.get_input_details()[0]
+        self.output_detail = self.model.get_output_details()[0]
+        self.input_shape = tuple(int(size) for size in self.input_detail['shape'][1:])
+
+    def predict(self, batch):
+        # One interpreter per engine, so invocations are serialised
+        with self.lock:
+            if len(batch) != self.batch_size:
+                self.model.resize_tensor_input(self.input_detail['index'], [len(batch), *self.input_shape])
+                self.model.allocate_tensors()
+                self.batch_size = len(batch)
+            self.model.set_tensor(self.input_detail['index'], quantize_input(batch, self.input_detail))
+            self.model.invoke()
+            return dequantize_output(self.model.get_tensor(self.output_detail['index']), self.output_detail)
+
+class ComparingEngine:
+    """Runs a primary engine and, on every Nth call, a reference engine for accuracy comparison"""
+
+    def __init__(self, primary, reference, every=10):
+        self.primary = primary
+        self.reference = reference
+        self.every = every  # Compare one call in this many
+        self.calls = 0
+        self.name = f"{primary.name}+{reference.name}"
+        self.actions = primary.actions
+
+    def preload(self, actions):
+        self.primary.preload(actions)
+        self.reference.preload(('emotion',))
+
+    def analyze(self, tile, actions):
+        return self.analyze_batch([tile], [actions])[0]
+
+    def analyze_batch(self, tiles, actions):
+        """Primary results; compared calls also carry the reference engine's dominant emotion"""
+        analyses = self.primary.analyze_batch(tiles, actions)
+        self.calls += 1
+        if self.calls % self.every == 0:
+            reference = self.reference.analyze_batch(tiles, [('emotion',)] * len(tiles))
+            for analysis, expected in zip(analyses, reference):
+                analysis['reference_emotion'] = expected['dominant_emotion']
+        return analyses
+
+# Engines selectable by name
+EMOTION_ENGINES = {
+    DeepFaceEngine.name: DeepFaceEngine,
+    TrainedEmotionEngine.name: TrainedEmotionEngine,
+    TFLiteEmotionEngine.name: TFLiteEmotionEngine,
+}
+
+def create_emotion_engine(name='deepface', model_path=None, compare_with=None, compare_every=10):
+    """Build an engine by name, optionally cross-checked against another engine"""
+    if name not in EMOTION_ENGINES:
+        raise ValueError(f"Unknown emotion engine: {name} (choose from {', '.join(EMOTION_ENGINES)})")
+    if model_path and name != DeepFaceEngine.name:
+        engine = EMOTION_ENGINES[name](model_path)
+    else:
+        engine = EMOTION_ENGINES[name]()
+    if compare_with:
+        engine = ComparingEngine(engine, create_emotion_engine(compare_with), every=compare_every)
+    return engine
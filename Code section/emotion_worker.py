@@ -0,0 +1,234 @@
+# Import required libraries for background emotion inference
+import queue  # Queue feeding the micro-batcher
+import threading  # Threading for the micro-batcher
+import time  # Time module for submission timestamps
+import numpy as np  # NumPy for the warm-up frame
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor  # Worker pools
+from stage_timer import NULL_TIMER  # Optional inference latency spans
+from emotion_engines import create_emotion_engine  # DeepFace or our own trained model on face tiles
+
+# One loaded engine per (name, model path, comparison) spec and worker process, shared by its threads
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _get_engine(engine_spec):
+    """The engine for a spec, created on first use in this process"""
+    engine = _engines.get(engine_spec)
+    if engine is None:
+        with _engines_lock:
+            if engine_spec not in _engines:
+                name, model_path, compare_with, compare_every = engine_spec
+                _engines[engine_spec] = create_emotion_engine(name, model_path, compare_with, compare_every)
+            engine = _engines[engine_spec]
+    return engine
+
+def _preload_model(actions, detector_backend, engine_spec=('deepface', None, None, 10)):
+    """Build the models for the requested actions once per worker"""
+    if detector_backend == 'skip':
+        # Face tiles go straight to the engine's models; one blank prediction finishes their set-up
+        engine = _get_engine(engine_spec)
+        engine.preload(actions)
+        engine.analyze(np.zeros((224, 224, 3), dtype=np.uint8), actions)
+        return
+    from deepface import DeepFace  # Imported here so process workers load it themselves
+    # Analysing a blank frame forces DeepFace to build and cache every model it needs
+    DeepFace.analyze(np.zeros((48, 48, 3), dtype=np.uint8), actions=list(actions),
+                     detector_backend=detector_backend, enforce_detection=False)
+
+def _analyze_frame(frame, actions, detector_backend, engine_spec=('deepface', None, None, 10)):
+    """Run DeepFace on one BGR frame (or face tile); returns the first face's analysis and its run time"""
+    start = time.perf_counter()
+    if detector_backend == 'skip':
+        # The frame is already an aligned face tile, so skip DeepFace's per-call detection and model lookup
+        return _get_engine(engine_spec).analyze(frame, actions), time.perf_counter() - start
+    from deepface import DeepFace
+    analysis = DeepFace.analyze(frame, actions=list(actions), detector_backend=detector_backend,
+                                enforce_detection=False)
+    # Handle case where analysis returns a list
+    if isinstance(analysis, list):
+        analysis = analysis[0]
+    return analysis, time.perf_counter() - start
+
+def _analyze_batch(tiles, actions, engine_spec):
+    """Run several face tiles through the engine together; returns the analyses and the batch run time"""
+    start = time.perf_counter()
+    return _get_engine(engine_spec).analyze_batch(tiles, actions), time.perf_counter() - start
+
+class MicroBatcher(threading.Thread):
+    """Groups face tiles arriving within max_wait seconds (up to max_batch) into one model call"""
+
+    def __init__(self, executor, engine_spec, max_batch=4, max_wait=0.02):
+        super().__init__(name="emotion-batcher", daemon=True)
+        self.executor = executor  # Pool that runs each whole batch
+        self.engine_spec = engine_spec  # Engine the workers run batches on
+        self.max_batch = max_batch  # Tiles per forward pass at most
+        self.max_wait = max_wait  # Seconds the first tile of a batch may wait for company
+        self.queue = queue.Queue()  # (tile, actions, future) waiting to be batched
+        self.batches = 0  # Forward passes dispatched
+        self.batched = 0  # Tiles dispatched in those passes
+
+    def submit(self, tile, actions):
+        """Queue one tile; the returned future resolves to (analysis, batch seconds)"""
+        future = Future()
+        self.queue.put((tile, actions, future))
+        return future
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Collect more tiles until the batch is full or the first tile has waited long enough
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._dispatch(batch)
+                    return
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Frames cancelled while waiting (e.g. at shutdown) are left out
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        tiles, actions, futures = zip(*batch)
+        self.batches += 1
+        self.batched += len(batch)
+        done = self.executor.submit(_analyze_batch, list(tiles), list(actions), self.engine_spec)
+        done.add_done_callback(lambda finished: self._fan_out(finished, futures))
+
+    def _fan_out(self, finished, futures):
+        """Hand each frame its own analysis from the batch result"""
+        error = finished.exception()
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        analyses, seconds = finished.result()
+        for future, analysis in zip(futures, analyses):
+            future.set_result((analysis, seconds))
+
+    def stop(self):
+        """Dispatch whatever is queued and stop batching"""
+        self.queue.put(None)
+        self.join(timeout=2.0)
+
+def _ready():
+    """No-op task; submitting one per worker makes the pool start (and preload) every worker"""
+    return True
+
+class EmotionWorkerPool:
+    """Runs emotion analysis (DeepFace or our own model) off the capture loop and hands results back by frame number"""
+
+    def __init__(self, actions=('emotion',), workers=1, max_in_flight=2, use_processes=False,
+                 detector_backend='opencv', stage_timer=NULL_TIMER, batch_size=1, batch_wait=0.02,
+                 engine='deepface', model_path=None, compare_with=None, compare_every=10):
+        self.actions = tuple(actions)  # Every action the workers preload models for
+        # 'skip' when frames are already cropped to the face, otherwise DeepFace detects again
+        self.detector_backend = detector_backend
+        # Face tiles run on the named engine ('deepface' or our own 'own' model), optionally
+        # cross-checked against a second engine on every compare_every-th call
+        if engine != 'deepface' and detector_backend != 'skip':
+            raise ValueError("Only the DeepFace engine can analyse whole frames; use detector_backend='skip'")
+        self.engine_spec = (engine, model_path, compare_with, compare_every)
+        # Batches can only fill if that many frames may be in flight at once
+        self.max_in_flight = max(max_in_flight, batch_size)  # Upper bound on queued + running analyses
+        self.timer = stage_timer  # Records DeepFace run time per analysis
+        self.workers = workers  # Number of worker threads or processes
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        # Every worker preloads the models so the first real frame is not slow
+        self.executor = executor_class(max_workers=workers, initializer=_preload_model,
+                                       initargs=(self.actions, self.detector_backend, self.engine_spec))
+        # With batch_size > 1 face tiles are grouped into one forward pass (face tiles only)
+        self.batcher = None
+        if batch_size > 1:
+            if detector_backend != 'skip':
+                raise ValueError("Batched inference needs pre-cropped face tiles (detector_backend='skip')")
+            self.batcher = MicroBatcher(self.executor, self.engine_spec, max_batch=batch_size, max_wait=batch_wait)
+            self.batcher.start()
+        self.pending = {}  # frame_number -> (future, submit_time)
+        self.submitted = 0  # Frames accepted for analysis
+        self.rejected = 0  # Frames refused because too many were in flight
+
+    def warm_up(self, timeout=None):
+        """Start every worker now and wait until each has built its models"""
+        # Executors start workers lazily on submit, which would put the model load on the first frames
+        futures = [self.executor.submit(_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def reset_stats(self):
+        """Zero the submission counters and drop leftover analyses (e.g. between sessions sharing one pool)"""
+        self.discard_pending()
+        self.submitted = 0
+        self.rejected = 0
+
+    def discard_pending(self):
+        """Forget uncollected analyses, cancelling those not started yet; returns how many were dropped"""
+        # Their frame numbers and times belong to a finished session and must not reach the next one
+        dropped = len(self.pending)
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        return dropped
+
+    def mean_batch_size(self):
+        """Average number of tiles per forward pass (1.0 without batching)"""
+        if self.batcher is None or not self.batcher.batches:
+            return 1.0
+        return self.batcher.batched / self.batcher.batches
+
+    def in_flight(self):
+        """Number of analyses submitted but not yet collected"""
+        return len(self.pending)
+
+    def submit(self, frame_number, frame, timestamp=None, actions=None):
+        """Queue a frame for analysis (optionally only some actions); returns False if the in-flight limit is reached"""
+        if len(self.pending) >= self.max_in_flight:
+            self.rejected += 1
+            return False
+        actions = self.actions if actions is None else tuple(actions)
+        if self.batcher is not None:
+            future = self.batcher.submit(frame, actions)
+        else:
+            future = self.executor.submit(_analyze_frame, frame, actions, self.detector_backend, self.engine_spec)
+        self.pending[frame_number] = (future, time.time() if timestamp is None else timestamp)
+        self.submitted += 1
+        return True
+
+    def collect(self, wait=False, timeout=None):
+        """Return (frame_number, timestamp, analysis, error) for every finished analysis"""
+        deadline = None if timeout is None else time.time() + timeout
+        finished = []
+        for frame_number in sorted(self.pending):
+            future, timestamp = self.pending[frame_number]
+            if not future.done():
+                if not wait:
+                    continue
+                remaining = None if deadline is None else max(0.0, deadline - time.time())
+                try:
+                    future.exception(timeout=remaining)
+                except Exception:
+                    # Still running when the timeout expired
+                    continue
+            del self.pending[frame_number]
+            error = future.exception()
+            analysis = None
+            if error is None:
+                analysis, seconds = future.result()
+                self.timer.record('deepface', seconds)
+            finished.append((frame_number, timestamp, analysis, error))
+        return finished
+
+    def shutdown(self):
+        """Cancel queued work and stop the workers"""
+        self.discard_pending()
+        if self.batcher is not None:
+            self.batcher.stop()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,39 @@
+# Import required libraries for landmark-based face cropping
+import cv2  # OpenCV for the affine warp
+import numpy as np  # NumPy for landmark geometry
+
+FACE_MESH_POINTS = 468  # Face contour landmarks (iris points from refine_landmarks excluded)
+LEFT_EYE_OUTER = 33  # Outer corner of the eye on the image left
+RIGHT_EYE_OUTER = 263  # Outer corner of the eye on the image right
+
+def face_alignment_matrix(landmarks_np, size=224, margin=0.15, align=True):
+    """Affine matrix mapping frame pixels to a square, eye-levelled face tile"""
+    points = landmarks_np[:FACE_MESH_POINTS, :2]
+    # Centre of the landmark bounding box
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+
+    # Rotate so the eye line is horizontal
+    angle = 0.0
+    if align:
+        eye_delta = points[RIGHT_EYE_OUTER] - points[LEFT_EYE_OUTER]
+        angle = np.arctan2(eye_delta[1], eye_delta[0])
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    rotation = np.array([[cos_a, sin_a], [-sin_a, cos_a]])
+
+    # Square side that fits the rotated landmarks plus a margin
+    rotated = (points - center) @ rotation.T
+    half_side = np.max(np.abs(rotated)) * (1 + margin)
+    scale = size / (2 * half_side) if half_side > 0 else 1.0
+
+    # Combine rotation, scale and translation into one warp
+    matrix = np.empty((2, 3), dtype=np.float64)
+    matrix[:, :2] = scale * rotation
+    matrix[:, 2] = size / 2 - matrix[:, :2] @ center
+    return matrix
+
+def crop_face_tile(frame, landmarks_np, size=224, margin=0.15, align=True):
+    """Cut a tight, aligned size x size face tile out of a frame using FaceMesh landmarks"""
+    matrix = face_alignment_matrix(landmarks_np, size, margin, align)
+    # A single warp crops, rotates and resizes without touching the rest of the frame
+    return cv2.warpAffine(frame, matrix, (size, size), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,97 @@
+# Import required libraries for vectorised facial feature extraction
+import numpy as np  # NumPy for the gather-and-norm kernel
+from operator import attrgetter  # Fast attribute access on landmark protos
+
+# Landmark pairs whose distances are needed every frame, measured in one gather
+DISTANCE_PAIRS = np.array([
+    (61, 291),   # Mouth width (left and right mouth corners)
+    (13, 14),    # Mouth height (upper and lower lip)
+    (159, 145),  # Left eye height (top and bottom)
+    (133, 33),   # Left eye width (inner and outer corner)
+    (386, 374),  # Right eye height (top and bottom)
+    (362, 263),  # Right eye width (inner and outer corner)
+    (33, 263),   # Inter-ocular distance used for scale normalisation
+])
+MOUTH_WIDTH, MOUTH_HEIGHT, LEFT_EYE_HEIGHT, LEFT_EYE_WIDTH, \
+    RIGHT_EYE_HEIGHT, RIGHT_EYE_WIDTH, INTER_OCULAR = range(len(DISTANCE_PAIRS))
+
+LEFT_EYEBROW = np.arange(65, 70)  # Left eyebrow points
+RIGHT_EYEBROW = np.arange(295, 300)  # Right eyebrow points
+LEFT_EYE_TOP = 159  # Top of left eye
+RIGHT_EYE_TOP = 386  # Top of right eye
+NOSE_BRIDGE = 1  # Nose bridge
+CHIN = 152  # Chin
+
+_get_x = attrgetter('x')  # Normalised x of a landmark
+_get_y = attrgetter('y')  # Normalised y of a landmark
+
+class LandmarkFeatureExtractor:
+    """Converts FaceMesh landmarks into a reusable float32 buffer and computes all geometric features"""
+
+    def __init__(self, width, height, num_landmarks=478):
+        self.num_landmarks = num_landmarks
+        self.scale = np.array([width, height], dtype=np.float32)  # Normalised -> pixel coordinates
+        # Two preallocated buffers swapped every frame so movement needs no allocation
+        self.points = np.zeros((num_landmarks, 2), dtype=np.float32)
+        self.previous = np.zeros((num_landmarks, 2), dtype=np.float32)
+        self.frames_loaded = 0  # Faces loaded so far
+        self.has_previous = False  # True once previous holds a real face
+        self.pair_a = DISTANCE_PAIRS[:, 0]
+        self.pair_b = DISTANCE_PAIRS[:, 1]
+
+    def load(self, face_landmarks):
+        """Fill the current buffer from a FaceMesh NormalizedLandmarkList and return it"""
+        landmarks = face_landmarks.landmark
+        count = min(len(landmarks), self.num_landmarks)
+        # Swap buffers so the last frame's points become the previous points
+        self.points, self.previous = self.previous, self.points
+        self.has_previous = self.frames_loaded > 0
+        self.frames_loaded += 1
+        # Pull x and y straight into the float32 columns without building tuples
+        points = self.points
+        points[:count, 0] = np.fromiter(map(_get_x, landmarks), dtype=np.float32, count=count)
+        points[:count, 1] = np.fromiter(map(_get_y, landmarks), dtype=np.float32, count=count)
+        points *= self.scale
+        return points
+
+    def features(self):
+        """Compute all per-frame geometric features from the current buffer"""
+        points = self.points
+        # One gather and one norm for every distance we need
+        distances = np.linalg.norm(points[self.pair_a] - points[self.pair_b], axis=1)
+
+        # Eyebrow heights from one gather over both eyebrows
+        left_brow_y = points[LEFT_EYEBROW, 1].mean()
+        right_brow_y = points[RIGHT_EYEBROW, 1].mean()
+
+        # Head tilt from nose bridge to chin
+        tilt_vector = points[CHIN] - points[NOSE_BRIDGE]
+        head_tilt = np.degrees(np.arctan2(tilt_vector[1], tilt_vector[0]))
+
+        return {
+            'mouth_width': float(distances[MOUTH_WIDTH]),
+            'mouth_height': float(distances[MOUTH_HEIGHT]),
+            'eyebrow_pos': float((left_brow_y + right_brow_y) / 2),
+            'left_brow_raise': float(points[LEFT_EYE_TOP, 1] - left_brow_y),
+            'right_brow_raise': float(points[RIGHT_EYE_TOP, 1] - right_brow_y),
+            'left_eye_ratio': float(distances[LEFT_EYE_HEIGHT] / (distances[LEFT_EYE_WIDTH] or 1.0)),
+            'right_eye_ratio': float(distances[RIGHT_EYE_HEIGHT] / (distances[RIGHT_EYE_WIDTH] or 1.0)),
+            'inter_ocular': float(distances[INTER_OCULAR]),
+            'head_tilt': float(head_tilt),
+        }
+
+    def movement(self):
+        """Mean landmark displacement since the previous frame"""
+        return float(np.mean(np.linalg.norm(self.points - self.previous, axis=1)))
+
+def expression_vector(features):
+    """Scale-free mouth, eyebrow and eye-ratio vector the inference scheduler compares between frames"""
+    inter_ocular = features['inter_ocular'] or 1.0
+    return np.array([
+        features['mouth_width'] / inter_ocular,
+        features['mouth_height'] / inter_ocular,
+        features['left_brow_raise'] / inter_ocular,
+        features['right_brow_raise'] / inter_ocular,
+        features['left_eye_ratio'],
+        features['right_eye_ratio']
+    ])
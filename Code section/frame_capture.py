@@ -0,0 +1,100 @@
+# Import required libraries for background frame capture
+import threading  # Threading for the dedicated capture loop
+import time  # Time module for frame timestamps
+from collections import deque  # Deque for the bounded frame slot
+from stage_timer import NULL_TIMER  # Optional capture latency spans
+
+# Drop policies for when the frame slot is full
+DROP_OLDEST = "drop-oldest"  # Discard the stale frame and keep the new one
+DROP_NEWEST = "drop-newest"  # Discard the new frame and keep the stale one
+BLOCK = "block"  # Wait until the consumer takes a frame
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class LatestFrameSlot:
+    """Bounded buffer that hands the freshest captured frames to the analysis loop"""
+
+    def __init__(self, capacity=1, drop_policy=DROP_OLDEST):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self.frames = deque()  # Pending (frame_id, timestamp, frame) tuples
+        self.condition = threading.Condition()  # Guards frames and wakes waiters
+        self.dropped = 0  # Number of frames discarded by the drop policy
+        self.closed = False  # Set once the producer has stopped
+
+    def put(self, item):
+        """Store a captured frame, applying the drop policy when the slot is full"""
+        with self.condition:
+            if len(self.frames) >= self.capacity:
+                if self.drop_policy == DROP_OLDEST:
+                    # Replace the stale frame so the consumer always sees the newest one
+                    self.frames.popleft()
+                    self.dropped += 1
+                elif self.drop_policy == DROP_NEWEST:
+                    # Keep what is already queued and discard the new frame
+                    self.dropped += 1
+                    return False
+                else:
+                    # Block the producer until space frees up or the slot is closed
+                    while len(self.frames) >= self.capacity and not self.closed:
+                        self.condition.wait()
+                    if self.closed:
+                        return False
+            self.frames.append(item)
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Take the next frame, or return None if the slot is closed or the wait times out"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.frames or self.closed, timeout):
+                return None
+            if not self.frames:
+                return None
+            item = self.frames.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """Wake all waiters and stop accepting frames"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class CaptureThread(threading.Thread):
+    """Reads frames from a capture device on its own thread and feeds a LatestFrameSlot"""
+
+    def __init__(self, cap, slot, stage_timer=NULL_TIMER):
+        super().__init__(name="frame-capture", daemon=True)
+        self.cap = cap  # Opened cv2.VideoCapture (or any object with read())
+        self.slot = slot  # Destination slot for captured frames
+        self.timer = stage_timer  # Records time spent in cap.read()
+        self.captured = 0  # Frames read from the device
+        self.failed = False  # True if the device stopped returning frames
+        self.running = threading.Event()
+        self.running.set()
+
+    def run(self):
+        try:
+            while self.running.is_set():
+                with self.timer.span('capture'):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    # Device stopped delivering frames
+                    self.failed = True
+                    break
+                self.captured += 1
+                self.slot.put((self.captured, time.time(), frame))
+        finally:
+            # Always release consumers waiting on the slot
+            self.slot.close()
+
+    def stop(self):
+        """Ask the capture loop to finish and wait for it"""
+        self.running.clear()
+        self.slot.close()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=2.0)
@@ -0,0 +1,74 @@
+# Import required libraries for overlay drawing and the out-of-process preview
+import multiprocessing  # Multiprocessing for the preview window process
+import queue  # Queue exceptions for the non-blocking hand-off
+import cv2  # OpenCV for drawing and the preview window
+
+OVERLAY_COLOR = (0, 255, 0)  # Green overlay text and landmarks
+
+def draw_overlay(frame, points, lines, scale=1.0):
+    """Draw landmark dots and (text, y) status lines onto a frame in place"""
+    for x, y in points:
+        cv2.circle(frame, (int(x * scale), int(y * scale)), 1, OVERLAY_COLOR, -1)
+    for text, y in lines:
+        cv2.putText(frame, text, (10, int(y * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.7 * scale, OVERLAY_COLOR, max(1, int(2 * scale)))
+    return frame
+
+def _preview_loop(frames, quit_event, window_name, scale):
+    """Preview process: render published frames and watch for the 'q' key"""
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        frame, points, lines = item
+        cv2.imshow(window_name, draw_overlay(frame, points, lines, scale))
+        # Exit on 'q' key press, reported back to the analysis loop
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            quit_event.set()
+    cv2.destroyAllWindows()
+
+class PreviewPublisher:
+    """Sends every Nth frame to a separate preview process so the analysis loop never renders"""
+
+    def __init__(self, every=5, scale=0.5, window_name='Facial Movement Analysis (preview)'):
+        self.every = every  # Publish one frame out of this many
+        self.scale = scale  # Downscale factor applied before sending
+        # 'spawn' keeps the child clear of the parent's model and camera threads
+        context = multiprocessing.get_context('spawn')
+        self.frames = context.Queue(maxsize=1)  # At most one frame waiting for the preview
+        self.quit_event = context.Event()
+        self.process = context.Process(target=_preview_loop, name="frame-preview", daemon=True,
+                                       args=(self.frames, self.quit_event, window_name, scale))
+        self.published = 0  # Frames handed to the preview
+        self.dropped = 0  # Frames skipped because the preview was still busy
+
+    def start(self):
+        self.process.start()
+
+    def publish(self, frame_number, frame, points, lines):
+        """Offer a frame and its overlay; skipped unless it is an Nth frame and the preview is free"""
+        if frame_number % self.every:
+            return False
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        try:
+            self.frames.put_nowait((small, [tuple(p) for p in points], list(lines)))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.published += 1
+        return True
+
+    def quit_requested(self):
+        """True once 'q' was pressed in the preview window"""
+        return self.quit_event.is_set()
+
+    def close(self):
+        """Stop the preview process"""
+        if self.process.is_alive():
+            try:
+                self.frames.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
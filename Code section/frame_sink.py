@@ -0,0 +1,91 @@
+# Import required libraries for background snapshot writing
+import os  # OS module for output paths
+import queue  # Queue for the bounded hand-off to the writer thread
+import threading  # Threading for the writer
+import time  # Time module for write latency
+import cv2  # OpenCV for image encoding
+import numpy as np  # NumPy for raw .npy snapshots
+from stage_timer import NULL_TIMER  # Optional write latency spans
+
+# Supported snapshot formats and the file extension for each
+FORMATS = {'jpg': '.jpg', 'png': '.png', 'webp': '.webp', 'npy': '.npy'}
+
+def encode_params(fmt, quality):
+    """OpenCV imwrite parameters for a format and a 0-100 quality"""
+    if fmt == 'jpg':
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if fmt == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, max(1, int(quality))]
+    if fmt == 'png':
+        # PNG is lossless; map higher quality to less compression effort
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(round((100 - quality) / 100 * 9))]
+    return []
+
+class FrameWriter(threading.Thread):
+    """Writes analysis snapshots on a background thread, dropping them when the disk falls behind"""
+
+    def __init__(self, directory="analysis_frames", fmt='jpg', quality=90, queue_size=8,
+                 stage_timer=NULL_TIMER):
+        super().__init__(name="frame-writer", daemon=True)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown snapshot format: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.params = encode_params(fmt, quality)
+        self.queue = queue.Queue(maxsize=queue_size)  # Bounded so a slow disk cannot grow memory
+        self.written = 0  # Snapshots written
+        self.dropped = 0  # Snapshots discarded because the queue was full
+        self.failed = 0  # Snapshots that could not be written
+        self.write_time = 0.0  # Seconds spent encoding and writing
+        self.timer = stage_timer  # Records encode + write time per snapshot
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, frame_number):
+        """File path a given frame's snapshot is written to"""
+        return os.path.join(self.directory, f"frame_{frame_number}{FORMATS[self.fmt]}")
+
+    def submit(self, frame_number, frame):
+        """Queue a snapshot without blocking; returns its path, or None if it was dropped"""
+        path = self.path_for(frame_number)
+        try:
+            self.queue.put_nowait((path, frame))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return path
+
+    def backpressure(self):
+        """Fraction of the queue in use (1.0 means new snapshots are being dropped)"""
+        return self.queue.qsize() / self.queue.maxsize
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                # Sentinel from close()
+                return
+            path, frame = item
+            start = time.perf_counter()
+            # Write beside the target and rename, so a file from an earlier session is replaced
+            # rather than overwritten in place (dataset hardlinks to it keep the old frame)
+            root, ext = os.path.splitext(path)
+            temp_path = root + ".tmp" + ext
+            try:
+                if self.fmt == 'npy':
+                    np.save(temp_path, frame)
+                elif not cv2.imwrite(temp_path, frame, self.params):
+                    raise IOError(f"cv2.imwrite failed for {path}")
+                os.replace(temp_path, path)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Snapshot write error: {str(e)}")
+            seconds = time.perf_counter() - start
+            self.write_time += seconds
+            self.timer.record('imwrite', seconds)
+
+    def close(self, timeout=5.0):
+        """Finish writing queued snapshots and stop the thread"""
+        if self.is_alive():
+            self.queue.put(None)
+            self.join(timeout=timeout)
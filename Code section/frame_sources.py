@@ -0,0 +1,148 @@
+# Import required libraries for pluggable frame sources
+import os  # OS module for directory listings
+import re  # Regular expressions for natural file ordering
+import time  # Time module for real-time replay pacing
+import cv2  # OpenCV for webcam, video and image decoding
+import numpy as np  # NumPy for synthetic frames
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+class _Pacer:
+    """Sleeps so frames are delivered at a fixed rate"""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps and fps > 0 else 0.0
+        self.next_time = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self.next_time is None:
+            self.next_time = now
+        elif self.next_time > now:
+            time.sleep(self.next_time - now)
+        self.next_time += self.interval
+
+class WebcamSource:
+    """Live camera through cv2.VideoCapture"""
+
+    live = True  # Frames arrive in real time on their own
+
+    def __init__(self, index=0, width=640, height=480, fps=60):
+        self.cap = cv2.VideoCapture(index)
+        if self.cap.isOpened():
+            # Set webcam resolution and frame rate
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.fps = fps
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileSource:
+    """Recorded clip, replayed as fast as possible or at its recorded frame rate"""
+
+    live = False
+
+    def __init__(self, path, realtime=False):
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pacer = _Pacer(self.fps if realtime else 0)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        self.pacer.wait()
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+def _natural_key(name):
+    """Sort frame_20.jpg before frame_100.jpg"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+class ImageDirectorySource:
+    """Directory of still images (e.g. analysis_frames/) replayed in natural order"""
+
+    live = False
+
+    def __init__(self, directory, fps=30.0, realtime=False, loop=False):
+        self.paths = [os.path.join(directory, name)
+                      for name in sorted(os.listdir(directory), key=_natural_key)
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.fps = fps
+        self.loop = loop  # Start again from the first image at the end
+        self.position = 0
+        self.pacer = _Pacer(fps if realtime else 0)
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.position = 0
+        self.pacer.wait()
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+    def release(self):
+        pass
+
+class SyntheticSource:
+    """Deterministic generated frames for benchmarking capture and conversion without a camera"""
+
+    live = False
+
+    def __init__(self, width=640, height=480, frames=300, fps=30.0, realtime=False, seed=0):
+        self.width, self.height = width, height
+        self.frames = frames  # Number of frames to generate (None for endless)
+        self.fps = fps
+        self.count = 0
+        self.pacer = _Pacer(fps if realtime else 0)
+        # Fixed noise background so every run produces identical frames
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 64, size=(height, width, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+        self.pacer.wait()
+        frame = self.background.copy()
+        # A face-sized ellipse drifting across the frame gives the pipeline something to track
+        center_x = int(self.width / 2 + self.width / 6 * np.sin(self.count / 15))
+        center = (center_x, self.height // 2)
+        cv2.ellipse(frame, center, (90, 120), 0, 0, 360, (150, 180, 220), -1)
+        cv2.circle(frame, (center_x - 35, self.height // 2 - 30), 10, (40, 40, 40), -1)
+        cv2.circle(frame, (center_x + 35, self.height // 2 - 30), 10, (40, 40, 40), -1)
+        cv2.ellipse(frame, (center_x, self.height // 2 + 50), (35, 12), 0, 0, 180, (60, 60, 160), 3)
+        self.count += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+def open_frame_source(source=0, realtime=False):
+    """Build a frame source from a camera index, video path, image directory or 'synthetic'"""
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return WebcamSource(int(source))
+    if source == 'synthetic':
+        return SyntheticSource(realtime=realtime)
+    if os.path.isdir(source):
+        return ImageDirectorySource(source, realtime=realtime)
+    return VideoFileSource(source, realtime=realtime)
@@ -0,0 +1,179 @@
+# Import required libraries for per-purpose inference configuration and model caching
+import threading  # Lock guarding model builds from several worker threads
+import time  # Time module for face-absence timing
+import cv2  # OpenCV for model input preprocessing
+import numpy as np  # NumPy for scores and identity signatures
+
+# Action sets by purpose: emotion drives the lamp, age/gender only describe who is there
+FRAME_ACTIONS = ('emotion',)
+IDENTITY_ACTIONS = ('age', 'gender')
+
+# DeepFace model names and output label order
+ACTION_MODELS = {'emotion': 'Emotion', 'age': 'Age', 'gender': 'Gender'}
+EMOTION_LABELS = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+GENDER_LABELS = ('Woman', 'Man')
+
+# Landmark pairs describing face shape rather than expression (eye corners, nose, cheeks, brow line)
+IDENTITY_PAIRS = (
+    (33, 133),   # Left eye width
+    (362, 263),  # Right eye width
+    (133, 362),  # Inner eye corners
+    (6, 1),      # Nose bridge to tip
+    (129, 358),  # Nose width
+    (234, 454),  # Face width at the cheeks
+    (168, 6),    # Upper nose bridge
+)
+
+def identity_signature(landmarks_np):
+    """Face-shape distance ratios that stay stable across expressions but differ between people"""
+    first, second = np.array(IDENTITY_PAIRS).T
+    distances = np.linalg.norm(landmarks_np[first] - landmarks_np[second], axis=1)
+    # Divide by the inter-ocular distance so the signature does not depend on camera distance
+    return distances / (np.linalg.norm(landmarks_np[33] - landmarks_np[263]) + 1e-6)
+
+class IdentityTracker:
+    """Detects when the person in front of the camera has probably changed"""
+
+    def __init__(self, threshold=0.2, absence_timeout=2.0, alpha=0.05):
+        self.threshold = threshold  # Mean relative signature change that counts as a new face
+        self.absence_timeout = absence_timeout  # Seconds without a face after which anyone may sit down
+        self.alpha = alpha  # Reference signature smoothing
+        self.reference = None  # Smoothed signature of the current person
+        self.last_seen = None  # When a face was last observed
+        self.changes = 0  # Identity changes detected (including the first face)
+
+    def update(self, landmarks_np, now=None):
+        """Feed one face's landmarks; returns True if it looks like a different person"""
+        now = time.time() if now is None else now
+        signature = identity_signature(landmarks_np)
+        changed = (self.reference is None
+                   or now - self.last_seen > self.absence_timeout
+                   or np.mean(np.abs(signature - self.reference) / (self.reference + 1e-6)) > self.threshold)
+        if changed:
+            self.reference = signature
+            self.changes += 1
+        else:
+            self.reference += self.alpha * (signature - self.reference)
+        self.last_seen = now
+        return changed
+
+class InferencePlan:
+    """Chooses the DeepFace actions per request: emotion every time, age/gender once per person"""
+
+    def __init__(self, frame_actions=FRAME_ACTIONS, identity_actions=IDENTITY_ACTIONS, identity=None):
+        self.frame_actions = tuple(frame_actions)
+        self.identity_actions = tuple(a for a in identity_actions if a not in self.frame_actions)
+        self.identity = identity or IdentityTracker()
+        self.identity_pending = False  # True until age/gender has been requested for the current person
+        self.identity_frame = None  # Frame whose analysis carries the pending age/gender
+        self.identity_runs = 0  # Analyses that included the identity actions
+        self.demographics = {}  # Latest age/gender fields for the current person
+
+    def all_actions(self):
+        """Every action the workers must have models for"""
+        return self.frame_actions + self.identity_actions
+
+    def observe(self, landmarks_np, now=None):
+        """Track the face seen this frame; a new person triggers a fresh age/gender request"""
+        if self.identity.update(landmarks_np, now) and self.identity_actions:
+            self.identity_pending = True
+            self.demographics = {}
+
+    def next_actions(self):
+        """Actions for the next analysis"""
+        return self.all_actions() if self.identity_pending else self.frame_actions
+
+    def submitted(self, frame_number, actions):
+        """Record an accepted submission"""
+        if self.identity_pending and len(actions) > len(self.frame_actions):
+            self.identity_pending = False
+            self.identity_frame = frame_number
+            self.identity_runs += 1
+
+    def failed(self, frame_number):
+        """Ask again for age/gender if the analysis carrying them failed"""
+        if frame_number == self.identity_frame:
+            self.identity_pending = True
+
+    def complete(self, analysis):
+        """Fill per-person fields (age, gender) into an emotion-only analysis"""
+        if 'age' in analysis or 'dominant_gender' in analysis:
+            self.demographics = {key: analysis[key] for key in ('age', 'gender', 'dominant_gender')
+                                 if key in analysis}
+        merged = {'age': float('nan'), 'gender': {}, 'dominant_gender': ''}
+        merged.update(self.demographics)
+        merged.update(analysis)
+        return merged
+
+def _build_deepface_model(model_name):
+    """Build one DeepFace attribute model and return the underlying Keras model"""
+    from deepface import DeepFace
+    try:
+        built = DeepFace.build_model(model_name=model_name, task="facial_attribute")
+    except TypeError:
+        # deepface < 0.0.93 takes only the model name
+        built = DeepFace.build_model(model_name)
+    # Newer versions wrap the Keras model in a client object
+    return getattr(built, 'model', built)
+
+def emotion_input(tile):
+    """48x48 grayscale input in [0, 1] for the emotion model"""
+    gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (48, 48), interpolation=cv2.INTER_AREA).astype(np.float32)[..., None] / 255.0
+
+def vgg_input(tile):
+    """224x224 BGR input in [0, 1] for the age and gender models"""
+    return cv2.resize(tile, (224, 224), interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+class DeepFaceModelCache:
+    """Builds each DeepFace attribute model once and runs it directly on aligned face tiles"""
+
+    def __init__(self):
+        self.models = {}  # action -> Keras model
+        self.lock = threading.Lock()
+
+    def get(self, action):
+        """The built model for an action, building it on first use"""
+        model = self.models.get(action)
+        if model is None:
+            with self.lock:
+                if action not in self.models:
+                    self.models[action] = _build_deepface_model(ACTION_MODELS[action])
+                model = self.models[action]
+        return model
+
+    def preload(self, actions):
+        """Build every model the given actions need"""
+        for action in actions:
+            self.get(action)
+
+    def analyze(self, tile, actions):
+        """DeepFace-style result (percent scores, dominant labels) for one BGR face tile"""
+        return self.analyze_batch([tile], [actions])[0]
+
+    def analyze_batch(self, tiles, actions):
+        """Results for several face tiles with one forward pass per model; actions[i] applies to tiles[i]"""
+        analyses = [{} for _ in tiles]
+        rows = [i for i, wanted in enumerate(actions) if 'emotion' in wanted]
+        if rows:
+            batch = np.stack([emotion_input(tiles[i]) for i in rows])
+            for i, scores in zip(rows, self.get('emotion').predict_on_batch(batch) * 100.0):
+                analyses[i]['emotion'] = {label: float(score) for label, score in zip(EMOTION_LABELS, scores)}
+                analyses[i]['dominant_emotion'] = EMOTION_LABELS[int(np.argmax(scores))]
+        # Age and gender share the same 224x224 input, so it is prepared once per tile
+        rows = [i for i, wanted in enumerate(actions) if 'age' in wanted or 'gender' in wanted]
+        if rows:
+            faces = {i: vgg_input(tiles[i]) for i in rows}
+            age_rows = [i for i in rows if 'age' in actions[i]]
+            if age_rows:
+                probabilities = self.get('age').predict_on_batch(np.stack([faces[i] for i in age_rows]))
+                ages = probabilities @ np.arange(probabilities.shape[1])
+                for i, age in zip(age_rows, ages):
+                    analyses[i]['age'] = float(age)
+            gender_rows = [i for i in rows if 'gender' in actions[i]]
+            if gender_rows:
+                scores = self.get('gender').predict_on_batch(np.stack([faces[i] for i in gender_rows])) * 100.0
+                for i, row in zip(gender_rows, scores):
+                    analyses[i]['gender'] = {label: float(score) for label, score in zip(GENDER_LABELS, row)}
+                    analyses[i]['dominant_gender'] = GENDER_LABELS[int(np.argmax(row))]
+        return analyses
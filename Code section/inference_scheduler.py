@@ -0,0 +1,44 @@
+# Import required libraries for adaptive emotion inference scheduling
+import time  # Time module for the staleness timer
+import numpy as np  # NumPy for feature drift
+
+class AdaptiveInferenceScheduler:
+    """Decides when emotion inference is worth running based on facial feature drift"""
+
+    def __init__(self, threshold=0.05, max_staleness=2.0, min_interval=0.0):
+        self.threshold = threshold  # Largest per-feature change tolerated without re-inferring
+        self.max_staleness = max_staleness  # Seconds before inference is forced regardless
+        self.min_interval = min_interval  # Seconds to wait between inferences at the least
+        self.last_features = None  # Features of the last analysed frame
+        self.last_time = None  # When the last analysed frame was submitted
+        self.checks = 0  # Frames offered to the scheduler
+        self.fired = 0  # Frames that triggered inference
+        self.stale_fired = 0  # Inferences forced by the staleness timer
+
+    def should_infer(self, features, now=None):
+        """Return True when the face has changed enough (or too long has passed) to re-infer"""
+        now = time.time() if now is None else now
+        self.checks += 1
+        if self.last_features is None:
+            return True
+        elapsed = now - self.last_time
+        if elapsed < self.min_interval:
+            return False
+        if elapsed >= self.max_staleness:
+            return True
+        # Largest absolute drift of any feature since the last analysed frame
+        drift = np.max(np.abs(features - self.last_features))
+        return drift > self.threshold
+
+    def mark_inferred(self, features, now=None):
+        """Record that inference was run on a frame with these features"""
+        now = time.time() if now is None else now
+        if self.last_time is not None and now - self.last_time >= self.max_staleness:
+            self.stale_fired += 1
+        self.last_features = np.array(features, copy=True)
+        self.last_time = now
+        self.fired += 1
+
+    def skipped(self):
+        """Number of checked frames that did not need inference"""
+        return self.checks - self.fired
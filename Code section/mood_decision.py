@@ -0,0 +1,69 @@
+# Import required libraries for smoothing emotion-driven brightness decisions
+import time  # Time module for the minimum dwell timer
+import numpy as np  # NumPy for the score EMA
+from session_store import EMOTIONS  # DeepFace emotion order
+from online_stats import POSITIVE_EMOTIONS, NEGATIVE_EMOTIONS  # Emotion groups
+
+# Lamp moods, the emotions feeding each one, and the brightness they map to
+MOOD_GROUPS = {
+    'positive': POSITIVE_EMOTIONS,
+    'negative': NEGATIVE_EMOTIONS,
+    'neutral': ('neutral',),
+}
+MOOD_BRIGHTNESS = {'positive': 100, 'negative': 30, 'neutral': 70}
+
+class MoodDecisionLayer:
+    """Turns noisy per-frame emotion scores into stable lamp mood changes"""
+
+    def __init__(self, alpha=0.3, min_dwell=3.0, hysteresis=0.15, initial_mood='neutral'):
+        self.alpha = alpha  # EMA weight of the newest scores
+        self.min_dwell = min_dwell  # Seconds a mood must hold before it can change
+        self.hysteresis = hysteresis  # Lead a new mood needs over the current one (0-1)
+        self.mood = initial_mood  # Mood currently shown by the lamp
+        self.smoothed = None  # EMA of the emotion score vector (fractions summing to 1)
+        self.last_change = None  # When the mood last changed
+        # Index arrays that pick each mood's emotions out of the score vector
+        self.group_indices = {mood: [EMOTIONS.index(e) for e in emotions]
+                              for mood, emotions in MOOD_GROUPS.items()}
+        self.updates = 0  # Emotion results received
+        self.actuations = 0  # Mood changes passed to the lamp
+        self.suppressed_hysteresis = 0  # Flips blocked because the lead was too small
+        self.suppressed_dwell = 0  # Flips blocked because the mood changed too recently
+
+    def mood_scores(self):
+        """Smoothed score for each mood: its strongest emotion, so the winner is the smoothed dominant emotion's mood"""
+        # A sum would favour 'negative' (four emotions) over 'neutral' (one)
+        return {mood: float(self.smoothed[indices].max()) for mood, indices in self.group_indices.items()}
+
+    def update(self, emotion_scores, now=None):
+        """Feed one DeepFace emotion dict; returns the new mood when the lamp should change, else None"""
+        now = time.monotonic() if now is None else now
+        if self.last_change is None:
+            self.last_change = now
+        self.updates += 1
+
+        scores = np.array([emotion_scores[e] for e in EMOTIONS], dtype=np.float64) / 100.0
+        if self.smoothed is None:
+            self.smoothed = scores
+        else:
+            self.smoothed = self.alpha * scores + (1 - self.alpha) * self.smoothed
+
+        mood_scores = self.mood_scores()
+        candidate = max(mood_scores, key=mood_scores.get)
+        if candidate == self.mood:
+            return None
+        if mood_scores[candidate] - mood_scores[self.mood] < self.hysteresis:
+            self.suppressed_hysteresis += 1
+            return None
+        if now - self.last_change < self.min_dwell:
+            self.suppressed_dwell += 1
+            return None
+
+        self.mood = candidate
+        self.last_change = now
+        self.actuations += 1
+        return candidate
+
+    def suppressed(self):
+        """Total lamp changes avoided by smoothing"""
+        return self.suppressed_hysteresis + self.suppressed_dwell
@@ -0,0 +1,155 @@
+# Import required libraries for incremental session statistics
+import math  # Math module for the square root in standard deviation
+from collections import deque  # Deque for the sliding emotion window
+
+# Emotion groups used by the summary, matching process_analysis_data
+POSITIVE_EMOTIONS = ('happy', 'surprise')
+NEGATIVE_EMOTIONS = ('sad', 'fear', 'angry', 'disgust')
+
+def movement_pattern(average_movement):
+    """Classify average landmark movement into high / moderate / low"""
+    if average_movement > 2.0:
+        return "high"
+    elif average_movement > 0.7:
+        return "moderate"
+    return "low"
+
+def add_conclusions(results, analysed, duration):
+    """Append the human-readable conclusions for a results dict"""
+    if results['smile_frames'] > analysed * 0.3:
+        results['conclusions'].append("The user was smiling frequently during the analysis.")
+
+    if results['sad_frames'] > analysed * 0.3:
+        results['conclusions'].append("The user showed sadness or negative emotions frequently.")
+
+    if results['crying_frames'] > analysed * 0.1:
+        results['conclusions'].append("The user may have been crying during the analysis.")
+
+    if results['blink_count'] > duration * 0.3:
+        results['conclusions'].append("The user blinked frequently, possibly indicating fatigue or stress.")
+
+    if results['movement_pattern'] == "high":
+        results['conclusions'].append("The user showed significant facial movement.")
+    elif results['movement_pattern'] == "low":
+        results['conclusions'].append("The user showed minimal facial movement.")
+
+    if abs(results['average_head_tilt']) > 15:
+        results['conclusions'].append("The user exhibited noticeable head tilting.")
+
+    return results
+
+class RunningStats:
+    """Welford running mean and population variance"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def variance(self):
+        """Population variance (same as np.var)"""
+        return self.m2 / self.count if self.count else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+class OnlineAnalysisAggregator:
+    """Updates the session summary per frame so results are available at any moment in O(1)"""
+
+    def __init__(self, window=300):
+        self.movement = RunningStats()  # Landmark movement per frame
+        self.head_tilt = RunningStats()  # Head tilt angle per frame
+        self.expression_counts = {}  # Whole-session emotion counts
+        self.analysed = 0  # Emotion results seen
+        self.smile_frames = 0
+        self.sad_frames = 0
+        self.crying_frames = 0
+        self.expression_changes = 0
+        self.last_expression = None
+        self.blink_count = 0
+        self.window = deque(maxlen=window)  # Most recent emotions for the sliding histogram
+        self.window_counts = {}  # Emotion counts within the window
+
+    def update_movement(self, movement, head_tilt):
+        """Add one frame's movement metrics"""
+        self.movement.update(float(movement))
+        self.head_tilt.update(float(head_tilt))
+
+    def update_blink(self):
+        """Count one blink"""
+        self.blink_count += 1
+
+    def update_expression(self, emotion, emotion_scores):
+        """Add one emotion result (in the order results are applied)"""
+        self.analysed += 1
+        self.expression_counts[emotion] = self.expression_counts.get(emotion, 0) + 1
+
+        # Categorize special expressions
+        if emotion in POSITIVE_EMOTIONS:
+            self.smile_frames += 1
+        elif emotion in NEGATIVE_EMOTIONS:
+            self.sad_frames += 1
+            if emotion_scores['sad'] > 60:  # Higher threshold for crying
+                self.crying_frames += 1
+
+        # Count expression changes
+        if self.last_expression and self.last_expression != emotion:
+            self.expression_changes += 1
+        self.last_expression = emotion
+
+        # Slide the recent-emotion window
+        if len(self.window) == self.window.maxlen:
+            oldest = self.window[0]
+            self.window_counts[oldest] -= 1
+            if not self.window_counts[oldest]:
+                del self.window_counts[oldest]
+        self.window.append(emotion)
+        self.window_counts[emotion] = self.window_counts.get(emotion, 0) + 1
+
+    def recent_mood(self):
+        """Most frequent emotion in the sliding window, or None before any result"""
+        if not self.window_counts:
+            return None
+        return max(self.window_counts, key=self.window_counts.get)
+
+    def results(self, duration):
+        """Summary dict with the same keys and conclusions as process_analysis_data, plus the recent mood"""
+        results = {
+            'total_frames': self.movement.count,
+            'duration': duration,
+            'average_movement': 0,
+            'movement_variance': 0,
+            'average_head_tilt': 0,
+            'expressions': {},
+            'expression_changes': 0,
+            'smile_frames': 0,
+            'sad_frames': 0,
+            'crying_frames': 0,
+            'blink_count': self.blink_count,
+            'movement_pattern': None,
+            'conclusions': [],
+            # Sliding-window view for continuous reporting: what the person looks like right now
+            'recent_mood': self.recent_mood(),
+            'recent_expressions': dict(self.window_counts)
+        }
+
+        # Match process_analysis_data, which needs both kinds of data
+        if not self.movement.count or not self.analysed:
+            return results
+
+        results['average_movement'] = self.movement.mean
+        results['movement_variance'] = self.movement.variance()
+        results['average_head_tilt'] = self.head_tilt.mean
+        results['movement_pattern'] = movement_pattern(self.movement.mean)
+        results['expressions'] = dict(self.expression_counts)
+        results['expression_changes'] = self.expression_changes
+        results['smile_frames'] = self.smile_frames
+        results['sad_frames'] = self.sad_frames
+        results['crying_frames'] = self.crying_frames
+        return add_conclusions(results, self.analysed, duration)
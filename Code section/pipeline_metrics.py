@@ -0,0 +1,162 @@
+# Import required libraries for live pipeline metrics
+import json  # JSON for periodic metric lines
+import threading  # Threading for the exporters and the registry lock
+import time  # Time module for uptime and rates
+from collections import deque  # Deque for bounded latency reservoirs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Prometheus text endpoint
+import numpy as np  # NumPy for quantiles
+from stage_timer import Span  # Same span object StageTimer uses
+
+QUANTILES = (0.5, 0.95, 0.99)  # Latency quantiles exported for every stage
+
+class MetricsRegistry:
+    """In-process counters, gauges and stage latencies with bounded memory; usable as a stage timer"""
+
+    enabled = True
+
+    def __init__(self, reservoir_size=1024, prefix="moodsync"):
+        self.prefix = prefix  # Metric name prefix for exporters
+        self.reservoir_size = reservoir_size  # Recent samples kept per stage for quantiles
+        self.stage_count = {}  # stage -> samples recorded
+        self.stage_sum = {}  # stage -> total seconds
+        self.stage_max = {}  # stage -> slowest sample in seconds
+        self.stage_recent = {}  # stage -> deque of recent samples
+        self.counters = {}  # name -> running total
+        self.gauges = {}  # name -> latest value
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def span(self, stage):
+        """Time a block: with metrics.span('facemesh'): ..."""
+        return Span(self, stage)
+
+    def record(self, stage, seconds):
+        """Add one latency sample (safe to call from any thread)"""
+        with self.lock:
+            if stage not in self.stage_count:
+                self.stage_count[stage] = 0
+                self.stage_sum[stage] = 0.0
+                self.stage_max[stage] = 0.0
+                self.stage_recent[stage] = deque(maxlen=self.reservoir_size)
+            self.stage_count[stage] += 1
+            self.stage_sum[stage] += seconds
+            if seconds > self.stage_max[stage]:
+                self.stage_max[stage] = seconds
+            self.stage_recent[stage].append(seconds)
+
+    def inc(self, name, amount=1):
+        """Add to an event counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        """Store the latest value of a gauge"""
+        self.gauges[name] = value
+
+    def snapshot(self):
+        """Copy of every metric, with latency quantiles and per-minute counter rates"""
+        with self.lock:
+            recent = {stage: np.array(values) for stage, values in self.stage_recent.items()}
+            stages = {
+                stage: {
+                    'count': self.stage_count[stage],
+                    'sum_s': self.stage_sum[stage],
+                    'max_s': self.stage_max[stage],
+                }
+                for stage in self.stage_count
+            }
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        for stage, values in recent.items():
+            if len(values):
+                for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                    stages[stage][f'p{int(q * 100)}_s'] = float(value)
+        uptime = time.time() - self.started
+        return {
+            'timestamp': time.time(),
+            'uptime_s': uptime,
+            'stages': stages,
+            'counters': counters,
+            'per_minute': {name: value * 60.0 / uptime for name, value in counters.items()} if uptime else {},
+            'gauges': gauges,
+        }
+
+    def prometheus_text(self):
+        """Render the current metrics in the Prometheus text exposition format"""
+        snap = self.snapshot()
+        prefix = self.prefix
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, stats in snap['stages'].items():
+            for q in QUANTILES:
+                key = f'p{int(q * 100)}_s'
+                if key in stats:
+                    lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[key]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["sum_s"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for name, value in snap['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in snap['gauges'].items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {snap['uptime_s']:.3f}")
+        return "\n".join(lines) + "\n"
+
+class PrometheusEndpoint:
+    """Serves /metrics in Prometheus text format on localhost from a background thread"""
+
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                # Keep scrapes out of the analysis console output
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class JsonLinesReporter:
+    """Appends a metrics snapshot as one JSON line every interval seconds"""
+
+    def __init__(self, registry, path="pipeline_metrics.jsonl", interval=10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def write(self):
+        """Append the current snapshot now"""
+        with open(self.path, "a") as f:
+            f.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def close(self):
+        """Stop reporting and write a final line"""
+        self.stopped.set()
+        self.thread.join(timeout=2.0)
+        self.write()
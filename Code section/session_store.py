@@ -0,0 +1,181 @@
+# Import required libraries for compact per-frame session storage
+import json  # JSON for the session log header
+import os  # OS module for log paths
+import time  # Time module for session ids
+import numpy as np  # NumPy structured arrays for columnar storage
+
+# Emotion labels in the order DeepFace reports them
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+EMOTION_INDEX = {emotion: index for index, emotion in enumerate(EMOTIONS)}
+
+# Column layout for facial movement metrics (one row per frame with a face)
+MOVEMENT_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('time', np.float64),
+    ('movement', np.float32),
+    ('mouth_width', np.float32),
+    ('mouth_height', np.float32),
+    ('eyebrow_pos', np.float32),
+    ('head_tilt', np.float32),
+])
+
+# Column layout for emotion analysis results (one row per analysed frame)
+EXPRESSION_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('time', np.float64),
+    ('emotion', np.int8),  # Index into EMOTIONS
+    ('emotion_scores', np.float32, (len(EMOTIONS),)),
+    ('age', np.float32),
+    ('gender', 'U5'),  # 'Man' or 'Woman'
+])
+
+# Row layout of the append-only session log the trainer reads labels from
+LOG_ANALYSIS = 0  # Row holds the emotion scores of an analysed frame
+LOG_SNAPSHOT = 1  # Row records a frame saved to disk
+SESSION_LOG_DTYPE = np.dtype([
+    ('session', np.int64),  # Session start time in milliseconds
+    ('frame', np.int64),
+    ('time', np.float64),  # Seconds since the session started
+    ('kind', np.int8),  # LOG_ANALYSIS or LOG_SNAPSHOT
+    ('emotion_scores', np.float32, (len(EMOTIONS),)),  # Analysis rows only
+    ('snapshot', 'S96'),  # Snapshot rows only: file name of the saved frame
+])
+
+class FrameRingBuffer:
+    """Fixed-capacity columnar store for per-frame records with optional spill to disk"""
+
+    def __init__(self, dtype, capacity=131072, spill_path=None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=self.dtype)  # Preallocated rows
+        self.count = 0  # Records appended over the whole session
+        self.spill_path = spill_path  # Raw .bin file that receives rows before they are overwritten
+        self.spilled = 0  # Records already written to the spill file
+        if spill_path:
+            # Start a fresh spill file for this session
+            open(spill_path, 'wb').close()
+
+    def __len__(self):
+        """Number of records currently held in memory"""
+        return min(self.count, self.capacity)
+
+    def append(self, **values):
+        """Write one record into the next slot, overwriting the oldest when full"""
+        row = self.data[self.count % self.capacity]
+        for name, value in values.items():
+            row[name] = value
+        self.count += 1
+        # Persist a full buffer before the next append starts overwriting it
+        if self.spill_path and self.count % self.capacity == 0:
+            self._spill(self.data)
+
+    def column(self, name):
+        """View of one column for the records in memory (storage order, no copy)"""
+        return self.data[name][:len(self)]
+
+    def ordered(self, name=None):
+        """Records (or one column) in chronological order; copies once the buffer has wrapped"""
+        values = self.data if name is None else self.data[name]
+        if self.count <= self.capacity:
+            return values[:self.count]
+        start = self.count % self.capacity
+        return np.concatenate((values[start:], values[:start]))
+
+    def covers_session(self):
+        """True if history() returns every record of the session, not just the latest window"""
+        return self.count <= self.capacity or bool(self.spill_path)
+
+    def history(self, name=None):
+        """All session records (or one column) in order: spilled rows from disk plus those in memory"""
+        if self.count <= self.capacity or not self.spill_path:
+            return self.ordered(name)
+        # Rows are spilled a full buffer at a time, so the rest sit at the start of the buffer
+        spilled = load_spilled(self.spill_path, self.dtype)[:self.spilled]
+        recent = self.data[:self.count - self.spilled]
+        if name is not None:
+            spilled, recent = spilled[name], recent[name]
+        return np.concatenate((spilled, recent)) if len(recent) else spilled
+
+    def last(self):
+        """Most recently appended record, or None if empty"""
+        if self.count == 0:
+            return None
+        return self.data[(self.count - 1) % self.capacity]
+
+    def close(self):
+        """Flush records not yet spilled so the spill file holds the full session"""
+        if self.spill_path and self.spilled < self.count:
+            self._spill(self.data[:self.count - self.spilled])
+
+    def _spill(self, rows):
+        with open(self.spill_path, 'ab') as f:
+            rows.tofile(f)
+        self.spilled += len(rows)
+
+def load_spilled(spill_path, dtype):
+    """Memory-map a spill file written by FrameRingBuffer"""
+    return np.memmap(spill_path, dtype=np.dtype(dtype), mode='r')
+
+class SessionLog:
+    """Append-only binary log of analysed frames and saved snapshots, shared by all sessions"""
+
+    def __init__(self, path="session_log.bin", session=None, flush_every=256):
+        self.path = path
+        self.session = int(time.time() * 1000) if session is None else session
+        self.rows = np.zeros(flush_every, dtype=SESSION_LOG_DTYPE)  # Rows waiting to be appended
+        self.pending = 0
+        self.written = 0  # Rows appended to the file by this session
+        self._check_header()
+
+    def _check_header(self):
+        """Write the JSON header describing the row layout, or make sure an existing log matches it"""
+        header = {'dtype': SESSION_LOG_DTYPE.descr, 'emotions': EMOTIONS,
+                  'kinds': {'analysis': LOG_ANALYSIS, 'snapshot': LOG_SNAPSHOT}}
+        header_path = self.path + ".json"
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                existing = json.load(f)
+            if existing != json.loads(json.dumps(header)):
+                raise ValueError(f"{self.path} was written with a different row layout; use a new log path")
+        else:
+            with open(header_path, "w") as f:
+                json.dump(header, f, indent=2)
+
+    def log_analysis(self, frame, timestamp, emotion_scores):
+        """Record the emotion scores of one analysed frame"""
+        row = self._next_row(frame, timestamp, LOG_ANALYSIS)
+        row['emotion_scores'] = emotion_scores
+
+    def log_snapshot(self, frame, timestamp, path):
+        """Record the file name a frame was saved under (the trainer matches snapshots by name)"""
+        # Only the name is stored, so the snapshot directory's length does not matter;
+        # NumPy would silently cut off anything longer than the field
+        name = os.path.basename(path).encode()
+        if len(name) > SESSION_LOG_DTYPE['snapshot'].itemsize:
+            raise ValueError(f"Snapshot file name too long for the session log: {os.path.basename(path)}")
+        row = self._next_row(frame, timestamp, LOG_SNAPSHOT)
+        row['snapshot'] = name
+
+    def _next_row(self, frame, timestamp, kind):
+        if self.pending == len(self.rows):
+            self.flush()
+        row = self.rows[self.pending]
+        row['session'] = self.session
+        row['frame'] = frame
+        row['time'] = timestamp
+        row['kind'] = kind
+        row['emotion_scores'] = 0
+        row['snapshot'] = b''
+        self.pending += 1
+        return row
+
+    def flush(self):
+        """Append buffered rows to the log file"""
+        if self.pending:
+            with open(self.path, 'ab') as f:
+                self.rows[:self.pending].tofile(f)
+            self.written += self.pending
+            self.pending = 0
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,97 @@
+# Import required libraries for per-stage latency measurement
+import threading  # Threading lock for stages recorded from worker threads
+import time  # Time module for high-resolution timestamps
+import numpy as np  # NumPy for percentiles
+
+class Span:
+    """Context manager that records the time spent inside it"""
+    __slots__ = ("timer", "stage", "start")
+
+    def __init__(self, timer, stage):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+class _NullSpan:
+    """Shared do-nothing span used when timing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class NullStageTimer:
+    """Timer that ignores everything, so disabled timing costs one method call per stage"""
+
+    enabled = False
+
+    def span(self, stage):
+        return _NULL_SPAN
+
+    def record(self, stage, seconds):
+        pass
+
+    def inc(self, name, amount=1):
+        pass
+
+    def set_gauge(self, name, value):
+        pass
+
+NULL_TIMER = NullStageTimer()
+
+class StageTimer:
+    """Collects latency samples per named pipeline stage and summarises them"""
+
+    enabled = True
+
+    def __init__(self):
+        self.samples = {}  # stage -> list of seconds
+        self.counters = {}  # Event counts such as brightness writes
+        self.gauges = {}  # Latest values such as queue depth
+        self.lock = threading.Lock()
+
+    def span(self, stage):
+        """Time a block: with timer.span('facemesh'): ..."""
+        return Span(self, stage)
+
+    def record(self, stage, seconds):
+        """Add one latency sample (safe to call from any thread)"""
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def inc(self, name, amount=1):
+        """Add to an event counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        """Store the latest value of a gauge"""
+        self.gauges[name] = value
+
+    def summary(self):
+        """Per-stage count, mean and p50/p95/p99 in milliseconds"""
+        with self.lock:
+            samples = {stage: np.array(values) * 1000.0 for stage, values in self.samples.items()}
+        report = {}
+        for stage, values in samples.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            report[stage] = {
+                'count': int(len(values)),
+                'mean_ms': float(values.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'total_s': float(values.sum() / 1000.0),
+            }
+        return report
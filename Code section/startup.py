@@ -0,0 +1,95 @@
+# Import required libraries for start-up profiling and deferred imports
+import importlib  # Importlib for deferred module loading
+import importlib.util  # Find installed packages without importing them
+import os  # OS module for the daemon's process id
+import signal  # Signals that trigger daemon sessions
+import threading  # Event the signal handler sets
+import time  # Time module for phase timing
+import traceback  # Report a failed daemon session without stopping the daemon
+import types  # Types module for the lazy module proxy
+import numpy as np  # NumPy for the warm-up frame
+
+class StartupProfiler:
+    """Times each start-up phase (imports, model builds, warm-up) and reports them"""
+
+    def __init__(self):
+        self.phases = []  # (name, seconds) in the order they ran
+
+    def phase(self, name):
+        """Time a block: with profiler.phase('warm up FaceMesh'): ..."""
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self):
+        """Print how long every phase took"""
+        print("\n=== Start-up Phases ===")
+        for name, seconds in self.phases:
+            print(f"{name:<32}{seconds:8.2f} s")
+        print(f"{'total':<32}{self.total():8.2f} s")
+
+class _Phase:
+    """Context manager recording one start-up phase"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def load(self):
+        """Import the real module now (e.g. inside a timed start-up phase)"""
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+def lazy_import(name):
+    """Return a proxy for a heavy module (mediapipe, deepface) that is imported when first used"""
+    return LazyModule(name)
+
+def is_installed(name):
+    """Check that a package can be imported without paying for the import"""
+    return importlib.util.find_spec(name) is not None
+
+def warm_up_face_mesh(face_mesh, width=640, height=480):
+    """Run FaceMesh once on a blank frame so its graph is initialised before the session starts"""
+    face_mesh.process(np.zeros((height, width, 3), dtype=np.uint8))
+
+def serve_sessions(run_session, interval=None, trigger_signal=signal.SIGUSR1):
+    """Keep the process (and its loaded models) alive; run a session per signal or every interval seconds"""
+    trigger = threading.Event()
+    signal.signal(trigger_signal, lambda *_: trigger.set())
+    print(f"Daemon ready (pid {os.getpid()}): send {signal.Signals(trigger_signal).name} to start a session"
+          + (f", or wait {interval:g} s" if interval else "") + ". Ctrl+C stops it.")
+    try:
+        while True:
+            trigger.wait(interval)
+            trigger.clear()
+            try:
+                run_session()
+            except Exception:
+                # One failed session (camera unplugged, bad frame) must not take the loaded models down
+                print("Session failed:")
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        print("\nDaemon stopped.")
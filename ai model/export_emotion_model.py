@@ -0,0 +1,173 @@
+# Import required libraries for exporting the trained emotion CNN to quantized TFLite
+import argparse  # Argparse for command-line options
+import json  # JSON for the label order and the comparison report
+import os  # OS module for dataset and output paths
+import time  # Time module for latency measurement
+import cv2  # OpenCV for loading dataset images
+import numpy as np  # NumPy for batches and accuracy
+import tensorflow as tf  # TensorFlow for the converter and the reference model
+# Same input and the same training/held-out split the model was trained with
+from train_emotion_model import DATA_DIR, IMG_SIZE, CHANNELS, VALIDATION_SPLIT, list_dataset_files
+
+MODES = ('float16', 'int8')  # Post-training quantization variants
+
+def load_class_order(model_path, data_dir=DATA_DIR):
+    """Class names in output order: the trainer's saved label file, else alphabetical like flow_from_directory"""
+    labels_path = os.path.join(os.path.dirname(os.path.abspath(model_path)), "emotion_model_labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            class_indices = json.load(f)
+        return sorted(class_indices, key=class_indices.get)
+    return sorted(name for name in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, name)))
+
+def load_image(path):
+    """Read one dataset image as the model's float input in [0, 1]"""
+    if CHANNELS == 1:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)[..., None]
+    else:
+        image = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_AREA)
+    return image.reshape(IMG_SIZE, IMG_SIZE, CHANNELS).astype(np.float32) / 255.0
+
+def load_split(class_order, data_dir=DATA_DIR):
+    """Training and held-out (path, label) pairs from the trainer's own VALIDATION_SPLIT split"""
+    if not os.path.isdir(data_dir):
+        return [], []
+    splits, class_names = list_dataset_files(data_dir)
+    # Renumber folder labels to the model's output order
+    output_index = {name: class_order.index(name) for name in class_names if name in class_order}
+    train, held_out = (
+        [(path, output_index[class_names[label]]) for path, label in zip(*splits[subset])
+         if class_names[label] in output_index]
+        for subset in ('training', 'validation')
+    )
+    return train, held_out
+
+def calibration_set(train, samples=200, seed=0):
+    """Random training images that set the int8 activation ranges"""
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(train), size=min(samples, len(train)), replace=False)
+    return np.stack([load_image(train[i][0]) for i in chosen])
+
+def as_float32(model):
+    """Rebuild a model trained under mixed precision with float32 layers (same weights) for conversion"""
+    config = model.get_config()
+    for layer in config['layers']:
+        layer['config']['dtype'] = 'float32'
+    float_model = tf.keras.Sequential.from_config(config)
+    float_model.set_weights(model.get_weights())
+    return float_model
+
+def convert(model, mode, calibration=None):
+    """Convert a Keras model to TFLite with float16 weights or full int8 quantization"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        converter.representative_dataset = lambda: ([image[None]] for image in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Integer input/output too, so the runtime never touches float kernels
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    return converter.convert()
+
+def tflite_predict(model_path, images):
+    """Class probabilities for every image, one at a time as in the live pipeline, and the mean latency"""
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=1)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    in_scale, in_zero = input_detail['quantization']
+    out_scale, out_zero = output_detail['quantization']
+    outputs = []
+    start = time.perf_counter()
+    for image in images:
+        batch = image[None]
+        if in_scale:
+            info = np.iinfo(input_detail['dtype'])
+            batch = np.clip(np.round(batch / in_scale + in_zero), info.min, info.max)
+        interpreter.set_tensor(input_detail['index'], batch.astype(input_detail['dtype']))
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_detail['index'])[0]
+        outputs.append((output.astype(np.float32) - out_zero) * out_scale if out_scale else output)
+    return np.array(outputs), (time.perf_counter() - start) / max(len(images), 1)
+
+def keras_predict(model, images):
+    """Reference probabilities and single-image latency of the float Keras model"""
+    outputs = []
+    start = time.perf_counter()
+    for image in images:
+        outputs.append(model.predict_on_batch(image[None])[0])
+    return np.array(outputs), (time.perf_counter() - start) / max(len(images), 1)
+
+def compare_models(model, exported, held_out):
+    """Accuracy, agreement with the float model, latency and size for every exported variant"""
+    images = np.stack([load_image(path) for path, _ in held_out])
+    labels = np.array([label for _, label in held_out])
+    reference, reference_latency = keras_predict(model, images)
+    reference_classes = reference.argmax(axis=1)
+    report = {
+        'held_out_images': int(len(images)),
+        'float32': {
+            'accuracy': float(np.mean(reference_classes == labels)),
+            'latency_ms': reference_latency * 1000.0,
+        },
+    }
+    for mode, path in exported.items():
+        probabilities, latency = tflite_predict(path, images)
+        classes = probabilities.argmax(axis=1)
+        report[mode] = {
+            'path': path,
+            'size_kb': os.path.getsize(path) / 1024.0,
+            'accuracy': float(np.mean(classes == labels)),
+            'agreement_with_float': float(np.mean(classes == reference_classes)),
+            'max_probability_error': float(np.abs(probabilities - reference).max()),
+            'latency_ms': latency * 1000.0,
+        }
+    return report
+
+def print_report(report):
+    """Print the float vs quantized comparison as a table"""
+    print(f"\n=== Quantized export on {report['held_out_images']} held-out images "
+          f"({VALIDATION_SPLIT:.0%} of each class) ===")
+    print(f"{'model':<10}{'size KB':>10}{'accuracy':>10}{'agree':>8}{'latency ms':>12}")
+    print(f"{'float32':<10}{'':>10}{report['float32']['accuracy']:>10.3f}{'':>8}{report['float32']['latency_ms']:>12.2f}")
+    for mode in MODES:
+        if mode in report:
+            stats = report[mode]
+            print(f"{mode:<10}{stats['size_kb']:>10.0f}{stats['accuracy']:>10.3f}"
+                  f"{stats['agreement_with_float']:>8.3f}{stats['latency_ms']:>12.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the trained emotion CNN to quantized TFLite")
+    parser.add_argument("--model", default="emotion_model_best.h5", help="trained Keras model")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES, help="quantization variants")
+    parser.add_argument("--calibration", type=int, default=200, help="training images used for int8 calibration")
+    parser.add_argument("--report", default="export_report.json", help="JSON comparison report path")
+    args = parser.parse_args()
+
+    model = as_float32(tf.keras.models.load_model(args.model, compile=False))
+    class_order = load_class_order(args.model)
+    train, held_out = load_split(class_order)
+    output_dir = os.path.dirname(os.path.abspath(args.model))
+
+    exported = {}
+    for mode in args.modes:
+        calibration = calibration_set(train, args.calibration) if mode == 'int8' else None
+        path = os.path.join(output_dir, f"emotion_model_{mode}.tflite")
+        with open(path, "wb") as f:
+            f.write(convert(model, mode, calibration))
+        exported[mode] = path
+        print(f"Exported {mode} model to '{path}'")
+
+    if held_out:
+        report = compare_models(model, exported, held_out)
+        print_report(report)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to '{args.report}'")
+    else:
+        print(f"No held-out images found in '{DATA_DIR}'; skipping the comparison report")
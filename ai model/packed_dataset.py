@@ -0,0 +1,187 @@
+# Import required libraries for the packed (sharded .npy) emotion dataset
+import argparse  # Argparse for command-line options
+import hashlib  # Content hashes of packed source files
+import json  # JSON for the shard index
+import os  # OS module for paths
+import time  # Time module for default session names
+from concurrent.futures import ThreadPoolExecutor  # Parallel image decoding while packing
+import cv2  # OpenCV for decoding and resizing frames
+import numpy as np  # NumPy for the uint8 shards
+
+INDEX_FILE = "index.json"  # Shard list, tile shape, class names and packed sessions
+SHARD_SIZE = 4096  # Tiles per shard file
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']  # Alphabetical, like flow_from_directory
+VALIDATION_EVERY = 5  # Every 5th tile of a shard is held out (20%), so appends never move old tiles between splits
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+DIGEST_SIZE = 16  # Bytes of BLAKE2 hash stored per packed tile
+
+def load_tile(path, image_size=48, channels=1):
+    """Decode one image into a uint8 tile of the packed shape, or None if it cannot be read"""
+    return _load_item(path, image_size, channels)[1]
+
+def _load_item(path, image_size=48, channels=1):
+    """Content hash of a source file and its decoded tile (None if the file cannot be read)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    digest = hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+    return digest, _decode_tile(data, image_size, channels)
+
+def _decode_tile(data, image_size, channels):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE if channels == 1 else cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    if channels == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    tile = cv2.resize(image, (image_size, image_size), interpolation=cv2.INTER_AREA)
+    return tile.reshape(image_size, image_size, channels)
+
+class PackedDataset:
+    """Labelled uint8 tiles stored as fixed-size .npy shards plus a JSON index"""
+
+    def __init__(self, directory, image_size=48, channels=1):
+        self.directory = directory
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'image_size': image_size, 'channels': channels,
+                          'class_names': list(EMOTIONS), 'sessions': [], 'shards': []}
+
+    @property
+    def tile_shape(self):
+        size = self.index['image_size']
+        return (size, size, self.index['channels'])
+
+    @property
+    def class_names(self):
+        return self.index['class_names']
+
+    def __len__(self):
+        return sum(shard['count'] for shard in self.index['shards'])
+
+    def label_of(self, emotion):
+        """Label number for an emotion; unseen emotions are added at the end so old labels stay valid"""
+        if emotion not in self.index['class_names']:
+            self.index['class_names'].append(emotion)
+        return self.index['class_names'].index(emotion)
+
+    def packed_digests(self):
+        """Content hashes of every source file already packed"""
+        digests = set()
+        for shard in self.index['shards']:
+            if 'hashes' in shard:
+                # Raw bytes rows, not 'S' strings: NumPy strips trailing NUL bytes from those
+                digests.update(row.tobytes() for row in np.load(os.path.join(self.directory, shard['hashes'])))
+        return digests
+
+    def append_session(self, items, session, shard_size=SHARD_SIZE, workers=8):
+        """Pack (image path, emotion) pairs not packed before into new shards; returns (packed, already packed)"""
+        if session in self.index['sessions']:
+            raise ValueError(f"Session '{session}' is already packed in {self.directory}")
+        os.makedirs(self.directory, exist_ok=True)
+        image_size, _, channels = self.tile_shape
+        buffer = np.empty((shard_size,) + self.tile_shape, dtype=np.uint8)
+        labels = np.empty(shard_size, dtype=np.int16)
+        hashes = np.empty((shard_size, DIGEST_SIZE), dtype=np.uint8)
+        # Sources are usually the cumulative emotion_dataset folder, so files packed by an
+        # earlier append are skipped; a repacked tile could otherwise land in both splits
+        known = self.packed_digests()
+        filled = packed = skipped = 0
+        items = list(items)
+        # Decode on a thread pool (OpenCV releases the GIL) and write shards sequentially
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            loaded = pool.map(lambda item: _load_item(item[0], image_size, channels), items)
+            for (_, emotion), (digest, tile) in zip(items, loaded):
+                if tile is None:
+                    continue
+                if digest in known:
+                    skipped += 1
+                    continue
+                known.add(digest)
+                buffer[filled] = tile
+                labels[filled] = self.label_of(emotion)
+                hashes[filled] = np.frombuffer(digest, dtype=np.uint8)
+                filled += 1
+                if filled == shard_size:
+                    self._write_shard(buffer, labels, hashes, filled, session)
+                    packed += filled
+                    filled = 0
+        if filled:
+            self._write_shard(buffer, labels, hashes, filled, session)
+            packed += filled
+        if packed:
+            self.index['sessions'].append(session)
+            self._save_index()
+        return packed, skipped
+
+    def _write_shard(self, buffer, labels, hashes, count, session):
+        number = len(self.index['shards'])
+        name = f"shard_{number:05d}"
+        np.save(os.path.join(self.directory, name + ".npy"), buffer[:count])
+        np.save(os.path.join(self.directory, name + "_labels.npy"), labels[:count])
+        np.save(os.path.join(self.directory, name + "_hashes.npy"), hashes[:count])
+        self.index['shards'].append({'images': name + ".npy", 'labels': name + "_labels.npy",
+                                     'hashes': name + "_hashes.npy", 'count': int(count), 'session': session})
+        # Record every finished shard so an interrupted append keeps what it wrote
+        self._save_index()
+
+    def _save_index(self):
+        # Write-then-rename so readers never see a half-written index
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def shards(self, subset=None):
+        """Yield (images, labels) per shard in file order, optionally only the 'training' or 'validation' split"""
+        # Images are memory-mapped, so each shard is read sequentially as it is consumed
+        for shard in self.index['shards']:
+            images = np.load(os.path.join(self.directory, shard['images']), mmap_mode='r')
+            labels = np.load(os.path.join(self.directory, shard['labels']))
+            if subset is None:
+                yield images, labels
+                continue
+            held_out = np.arange(len(labels)) % VALIDATION_EVERY == 0
+            keep = held_out if subset == 'validation' else ~held_out
+            yield images[keep], labels[keep]
+
+    def counts(self):
+        """Tiles per class across all shards"""
+        totals = np.zeros(len(self.class_names), dtype=np.int64)
+        for _, labels in self.shards():
+            totals += np.bincount(labels, minlength=len(totals))
+        return dict(zip(self.class_names, totals.tolist()))
+
+def folder_items(data_dir):
+    """(path, emotion) pairs from an emotion_dataset-style folder of class subfolders"""
+    for emotion in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, emotion)
+        if os.path.isdir(folder):
+            for name in sorted(os.listdir(folder)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(folder, name), emotion
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack labelled frames into sharded uint8 .npy files")
+    parser.add_argument("packed_dir", help="packed dataset directory (created if missing)")
+    parser.add_argument("--source", default="emotion_dataset", help="folder of per-emotion subfolders to append")
+    parser.add_argument("--session", help="name recorded for this append (default: source folder name and time)")
+    parser.add_argument("--image-size", type=int, default=48, help="tile size for a new packed dataset")
+    parser.add_argument("--channels", type=int, choices=(1, 3), default=1, help="tile channels for a new packed dataset")
+    parser.add_argument("--info", action="store_true", help="only print what is packed")
+    args = parser.parse_args()
+
+    dataset = PackedDataset(args.packed_dir, image_size=args.image_size, channels=args.channels)
+    if not args.info:
+        session = args.session or f"{os.path.basename(os.path.normpath(args.source))}-{time.strftime('%Y%m%d-%H%M%S')}"
+        packed, skipped = dataset.append_session(folder_items(args.source), session)
+        print(f"Packed {packed} new tiles from '{args.source}' as session '{session}' "
+              f"({skipped} already packed)")
+    print(f"{len(dataset)} tiles of shape {dataset.tile_shape} in {len(dataset.index['shards'])} shards, "
+          f"{len(dataset.index['sessions'])} sessions")
+    for emotion, count in dataset.counts().items():
+        print(f"  {emotion:<10}{count:>8}")
@@ -1,55 +1,135 @@
 # Import required libraries for image processing, model building, and data handling
+import argparse  # For command-line options
+import hashlib  # For content hashes when deduplicating frames
+import multiprocessing  # For running each training benchmark configuration in a fresh process
 import os  # For file and directory operations
+import resource  # For peak memory (RSS) reporting
+import threading  # For the shared hash table of the organiser
+from collections import Counter  # For the organiser summary
+from concurrent.futures import ThreadPoolExecutor  # For organising frames in parallel
+import time  # For input pipeline throughput measurement
 import cv2  # For image loading and preprocessing
 import numpy as np  # For numerical computations
 import tensorflow as tf  # For building and training the CNN
 from tensorflow.keras.preprocessing.image import ImageDataGenerator  # For data augmentation
 from tensorflow.keras.models import Sequential  # For sequential model
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Flatten, Dropout  # For CNN layers
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint  # For training callbacks
+from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Flatten, GlobalAveragePooling2D, Dropout  # For CNN layers
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ModelCheckpoint  # For training callbacks
 import shutil  # For file moving
 from sklearn.model_selection import train_test_split  # For splitting dataset
 import json  # For loading analysis results
+from packed_dataset import PackedDataset  # Sharded uint8 tiles read with sequential I/O
 
 # Define emotion classes based on DeepFace output
 EMOTIONS = ['happy', 'sad', 'angry', 'surprise', 'fear', 'neutral', 'disgust']
-IMG_SIZE = 224  # Target image size for resizing
+IMG_SIZE = 48  # Target image size for resizing (FER2013-style input the live pipeline feeds from the FaceMesh crop)
+COLOR_MODE = 'grayscale'  # Single-channel input, as in the FER2013 notebook
+CHANNELS = 1 if COLOR_MODE == 'grayscale' else 3  # Input channels for the CNN
 BATCH_SIZE = 32  # Batch size for training
 DATA_DIR = "emotion_dataset"  # Directory to store organized dataset
+SESSION_LOG = "session_log.bin"  # Append-only per-frame log written by the analysis script
+PACKED_DIR = "emotion_packed"  # Sharded .npy version of the dataset (see packed_dataset.py)
+VALIDATION_SPLIT = 0.2  # Share of each class held out for validation
+AUTOTUNE = tf.data.AUTOTUNE  # Let tf.data pick parallelism and prefetch depth
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')  # Formats tf.io.decode_image reads
+HASH_MANIFEST = ".content_hashes.json"  # Content hash -> file already in DATA_DIR
+DIGEST_CHARS = 12  # Leading hash characters appended to organised file names
+FICLONE = 0x40049409  # Linux ioctl that clones a file's extents (reflink) on btrfs/XFS
 
-def load_analysis_results(results_file="analysis_results.txt"):
-    """Load frame-to-emotion mappings from analysis_results.txt or expression_data"""
-    # Placeholder for frame-to-emotion mapping
-    # In practice, parse analysis_results.txt or re-run analyze_facial_movement to get expression_data
+def read_session_log(log_path=SESSION_LOG):
+    """Memory-map the analysis script's session log; returns its rows and the emotion order of the scores"""
+    with open(log_path + ".json") as f:
+        header = json.load(f)
+    # JSON turns the dtype's tuples into lists; shaped fields carry a third entry
+    dtype = np.dtype([(field[0], field[1]) + ((tuple(field[2]),) if len(field) > 2 else ())
+                      for field in header['dtype']])
+    if os.path.getsize(log_path) == 0:
+        return np.zeros(0, dtype=dtype), header['emotions'], header['kinds']
+    return np.memmap(log_path, dtype=dtype, mode='r'), header['emotions'], header['kinds']
+
+def load_analysis_results(log_path=SESSION_LOG, max_gap=1.0):
+    """Map saved frames to emotions using the nearest analysed frame from the structured session log"""
     frame_emotions = {}
     
-    # Example: Assume expression_data is available or parsed from results
-    # This is a simplified mock-up; you may need to parse the actual file
-    # For demonstration, assume frames are mapped to emotions based on frame numbers
-    try:
-        with open(results_file, 'r') as f:
-            lines = f.readlines()
-            # Parse expressions from the file (adjust based on actual format)
-            for line in lines:
-                if line.startswith("Expressions:"):
-                    expressions_str = line.split(":")[1].strip()
-                    expressions = eval(expressions_str)  # Convert string dict to dict
-                    for emotion, count in expressions.items():
-                        # Distribute frames evenly (simplified assumption)
-                        for i in range(count):
-                            frame_num = len(frame_emotions) * 10  # Approximate frame number
-                            frame_emotions[f"frame_{frame_num}.jpg"] = emotion
-    except Exception as e:
-        print(f"Error loading analysis results: {e}")
+    if not os.path.exists(log_path):
+        print(f"Session log '{log_path}' not found; using mock labels for demonstration")
         # Fallback: Mock data for demonstration
         for i in range(1000):  # Assume 1000 frames
             frame_num = i * 10
             emotion = EMOTIONS[i % len(EMOTIONS)]  # Cycle through emotions
             frame_emotions[f"frame_{frame_num}.jpg"] = emotion
+        return frame_emotions
+    
+    rows, emotions, kinds = read_session_log(log_path)
+    analyses = rows[rows['kind'] == kinds['analysis']]
+    snapshots = rows[rows['kind'] == kinds['snapshot']]
+    # Sort once by (session, time); each session is then a contiguous slice found by binary search
+    analyses = analyses[np.lexsort((analyses['time'], analyses['session']))]
+    snapshots = snapshots[np.argsort(snapshots['session'], kind='stable')]
+    sessions, snapshot_starts = np.unique(snapshots['session'], return_index=True)
+    snapshot_ends = np.append(snapshot_starts[1:], len(snapshots))
+    analysis_starts = np.searchsorted(analyses['session'], sessions, side='left')
+    analysis_ends = np.searchsorted(analyses['session'], sessions, side='right')
+    # Sessions are processed in order, so a file name reused by a later session
+    # (the only copy still on disk) ends up with that session's label, or none
+    for i in range(len(sessions)):
+        session_analyses = analyses[analysis_starts[i]:analysis_ends[i]]
+        session_snapshots = snapshots[snapshot_starts[i]:snapshot_ends[i]]
+        # This session overwrote these files, so earlier labels no longer describe them
+        for path in session_snapshots['snapshot']:
+            frame_emotions.pop(os.path.basename(path.decode()), None)
+        if len(session_analyses) == 0:
+            continue
+        times = session_analyses['time']
+        # Nearest analysis in time for every snapshot
+        after = np.clip(np.searchsorted(times, session_snapshots['time']), 0, len(times) - 1)
+        before = np.clip(after - 1, 0, len(times) - 1)
+        use_before = np.abs(times[before] - session_snapshots['time']) < np.abs(times[after] - session_snapshots['time'])
+        nearest = np.where(use_before, before, after)
+        close_enough = np.abs(times[nearest] - session_snapshots['time']) <= max_gap
+        labels = np.argmax(session_analyses['emotion_scores'][nearest], axis=1)
+        for path, label in zip(session_snapshots['snapshot'][close_enough], labels[close_enough]):
+            frame_emotions[os.path.basename(path.decode())] = emotions[label]
+    print(f"Labelled {len(frame_emotions)} saved frames from {len(analyses)} analysed frames")
     
     return frame_emotions
 
-def organize_dataset(frame_emotions, source_dir="analysis_frames"):
+def _file_digest(path):
+    """BLAKE2 hash of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src at dst (same filesystem, btrfs/XFS)"""
+    import fcntl  # Linux-only, so imported where it is used
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+
+def _place_file(src, dst, link_mode='auto'):
+    """Put src at dst by reflink or copy ('auto'), or by hardlink only when asked; returns the method used"""
+    if os.path.lexists(dst):
+        return 'existing'
+    if link_mode == 'hardlink':
+        # Shares the inode: only safe while nothing rewrites analysis_frames in place
+        # (the older analysis scripts still cv2.imwrite over frame_N.jpg)
+        os.link(src, dst)
+        return 'hardlinked'
+    if link_mode in ('auto', 'reflink'):
+        try:
+            _reflink(src, dst)
+            return 'reflinked'
+        except (OSError, ImportError):
+            if link_mode == 'reflink':
+                raise
+    shutil.copy(src, dst)  # Copy to preserve original
+    return 'copied'
+
+def organize_dataset(frame_emotions, source_dir="analysis_frames", link_mode='auto', workers=8, dedupe=True):
     """Organize frames into subdirectories based on emotions"""
     # Create dataset directory
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -58,15 +138,67 @@ def organize_dataset(frame_emotions, source_dir="analysis_frames"):
     for emotion in EMOTIONS:
         os.makedirs(os.path.join(DATA_DIR, emotion), exist_ok=True)
     
-    # Move frames to corresponding emotion directories
-    for frame_name, emotion in frame_emotions.items():
+    # Hashes of frames already in the dataset, so identical frames are stored once
+    manifest_path = os.path.join(DATA_DIR, HASH_MANIFEST)
+    known = {}
+    if dedupe and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            known = json.load(f)
+    lock = threading.Lock()
+    in_progress = set()  # Hashes another worker is placing right now
+    missing = []
+    
+    def place(item):
+        frame_name, emotion = item
         src_path = os.path.join(source_dir, frame_name)
-        dst_path = os.path.join(DATA_DIR, emotion, frame_name)
-        if os.path.exists(src_path):
-            shutil.copy(src_path, dst_path)  # Copy to preserve original
-            print(f"Copied {frame_name} to {emotion} folder")
-        else:
-            print(f"Frame {frame_name} not found in {source_dir}")
+        try:
+            # Reading the file to hash it also tells us whether it exists
+            digest = _file_digest(src_path)
+        except FileNotFoundError:
+            missing.append(frame_name)
+            return 'missing'
+        # Frame names restart every session, so the stored name carries the content hash;
+        # an existing destination then really holds the same frame
+        stem, ext = os.path.splitext(frame_name)
+        relative_path = os.path.join(emotion, f"{stem}_{digest[:DIGEST_CHARS]}{ext}")
+        if dedupe:
+            with lock:
+                if digest in known or digest in in_progress:
+                    return 'duplicate'
+                in_progress.add(digest)
+        outcome = 'missing'
+        try:
+            outcome = _place_file(src_path, os.path.join(DATA_DIR, relative_path), link_mode)
+        except FileNotFoundError:
+            missing.append(frame_name)
+        finally:
+            if dedupe:
+                with lock:
+                    in_progress.discard(digest)
+                    # Only frames that are now in the dataset go into the manifest
+                    if outcome != 'missing':
+                        known[digest] = relative_path
+        return outcome
+    
+    # Link or copy frames on a worker pool; the work is file-system bound, so threads suffice
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = Counter(pool.map(place, frame_emotions.items()))
+    elapsed = time.perf_counter() - start
+    
+    if dedupe:
+        with open(manifest_path, 'w') as f:
+            json.dump(known, f)
+    
+    # One summary instead of a line per file
+    placed = outcomes['hardlinked'] + outcomes['reflinked'] + outcomes['copied']
+    print(f"Organized {placed} of {len(frame_emotions)} frames in {elapsed:.2f} s: "
+          f"{outcomes['hardlinked']} hardlinked, {outcomes['reflinked']} reflinked, {outcomes['copied']} copied, "
+          f"{outcomes['duplicate']} duplicates skipped, {outcomes['existing']} already present, "
+          f"{outcomes['missing']} not found in {source_dir}")
+    if missing:
+        print(f"First missing frames: {', '.join(sorted(missing)[:5])}")
+    return dict(outcomes)
 
 def create_data_generators():
     """Create data generators for training, validation, and testing with augmentation"""
@@ -88,6 +220,7 @@ def create_data_generators():
     train_generator = train_datagen.flow_from_directory(
         DATA_DIR,
         target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode=COLOR_MODE,
         batch_size=BATCH_SIZE,
         class_mode='categorical',
         subset='training',
@@ -97,6 +230,7 @@ def create_data_generators():
     valid_generator = valid_datagen.flow_from_directory(
         DATA_DIR,
         target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode=COLOR_MODE,
         batch_size=BATCH_SIZE,
         class_mode='categorical',
         subset='validation',
@@ -105,11 +239,206 @@ def create_data_generators():
     
     return train_generator, valid_generator
 
-def build_cnn_model():
+def list_dataset_files(data_dir=DATA_DIR):
+    """Image paths and labels split per class like flow_from_directory(validation_split=VALIDATION_SPLIT)"""
+    # Classes are sorted alphabetically, matching the generator's class_indices
+    class_names = sorted(name for name in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, name)))
+    splits = {'training': ([], []), 'validation': ([], [])}
+    for label, name in enumerate(class_names):
+        files = sorted(f for f in os.listdir(os.path.join(data_dir, name)) if f.lower().endswith(IMAGE_EXTENSIONS))
+        # The generator holds out the first share of each class's sorted files
+        split = int(len(files) * VALIDATION_SPLIT)
+        for subset, chosen in (('validation', files[:split]), ('training', files[split:])):
+            splits[subset][0].extend(os.path.join(data_dir, name, f) for f in chosen)
+            splits[subset][1].extend([label] * len(chosen))
+    return splits, class_names
+
+def decode_image(path, label):
+    """Read, decode and resize one image to a uint8 tile of the model input size"""
+    image = tf.io.decode_image(tf.io.read_file(path), channels=CHANNELS, expand_animations=False)
+    image = tf.image.resize(image, (IMG_SIZE, IMG_SIZE))
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8), label
+
+def to_model_input(images, labels, num_classes):
+    """Scale a batch of uint8 tiles to [0, 1] and one-hot encode its labels"""
+    return tf.cast(images, tf.float32) / 255.0, tf.one_hot(labels, num_classes)
+
+def build_augmenter():
+    """Batch-level augmentation matching the generator's rotation, shifts and flips"""
+    return Sequential([
+        tf.keras.layers.RandomRotation(20 / 360, fill_mode='nearest'),
+        tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode='nearest'),
+        tf.keras.layers.RandomFlip('horizontal'),
+    ])
+
+def create_tf_datasets(data_dir=DATA_DIR, batch_size=BATCH_SIZE, cache_dir=None, shuffle_buffer=8192):
+    """Training and validation tf.data pipelines with parallel decode, caching and prefetch"""
+    splits, class_names = list_dataset_files(data_dir)
+    augmenter = build_augmenter()
+    datasets = {}
+    for subset, (paths, labels) in splits.items():
+        if subset == 'training':
+            # Files are listed class by class; mix them once up front so the bounded
+            # shuffle buffer below never sees long single-class runs
+            order = np.random.default_rng(0).permutation(len(paths))
+            paths, labels = [paths[i] for i in order], [labels[i] for i in order]
+        dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+        dataset = dataset.map(decode_image, num_parallel_calls=AUTOTUNE)
+        # Decoded uint8 tiles are cached (in memory, or on disk for datasets larger than RAM),
+        # so JPEG decoding only happens in the first epoch; uint8 keeps the cache 4x smaller than floats
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            dataset = dataset.cache(os.path.join(cache_dir, subset))
+        else:
+            dataset = dataset.cache()
+        if subset == 'training':
+            # A bounded buffer keeps memory flat, even when the cache lives on disk
+            dataset = dataset.shuffle(min(shuffle_buffer, max(len(paths), 1)), reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(lambda images, labels: to_model_input(images, labels, len(class_names)),
+                              num_parallel_calls=AUTOTUNE)
+        if subset == 'training':
+            # Augment whole batches at once instead of image by image
+            dataset = dataset.map(lambda images, labels: (augmenter(images, training=True), labels),
+                                  num_parallel_calls=AUTOTUNE)
+        datasets[subset] = dataset.prefetch(AUTOTUNE)
+    return datasets['training'], datasets['validation'], {name: i for i, name in enumerate(class_names)}
+
+def create_packed_datasets(packed_dir=PACKED_DIR, batch_size=BATCH_SIZE, shuffle_buffer=8192):
+    """Training and validation tf.data pipelines reading packed shards instead of individual image files"""
+    packed = PackedDataset(packed_dir)
+    if packed.tile_shape != (IMG_SIZE, IMG_SIZE, CHANNELS):
+        raise ValueError(f"{packed_dir} holds {packed.tile_shape} tiles but the model expects "
+                         f"{(IMG_SIZE, IMG_SIZE, CHANNELS)}; repack with matching --image-size/--channels")
+    num_classes = len(packed.class_names)
+    augmenter = build_augmenter()
+    signature = (tf.TensorSpec((None,) + packed.tile_shape, tf.uint8), tf.TensorSpec((None,), tf.int16))
+    datasets = {}
+    for subset in ('training', 'validation'):
+        # Whole shards come off disk in order and are split into tiles inside tf.data
+        dataset = tf.data.Dataset.from_generator(lambda subset=subset: packed.shards(subset),
+                                                 output_signature=signature).unbatch()
+        dataset = dataset.map(lambda image, label: (tf.cast(image, tf.float32) / 255.0,
+                                                    tf.one_hot(tf.cast(label, tf.int32), num_classes)),
+                              num_parallel_calls=AUTOTUNE)
+        if subset == 'training':
+            dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size)
+        if subset == 'training':
+            dataset = dataset.map(lambda images, labels: (augmenter(images, training=True), labels),
+                                  num_parallel_calls=AUTOTUNE)
+        datasets[subset] = dataset.prefetch(AUTOTUNE)
+    return datasets['training'], datasets['validation'], {name: i for i, name in enumerate(packed.class_names)}
+
+def create_legacy_generators():
+    """The original ImageDataGenerator pipeline (decodes every image in Python each epoch)"""
+    train_datagen = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        horizontal_flip=True,
+        validation_split=VALIDATION_SPLIT
+    )
+    
+    train_generator = train_datagen.flow_from_directory(
+        DATA_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode=COLOR_MODE,
+        batch_size=BATCH_SIZE,
+        class_mode='categorical',
+        subset='training',
+        shuffle=True
+    )
+    
+    valid_generator = train_datagen.flow_from_directory(
+        DATA_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode=COLOR_MODE,
+        batch_size=BATCH_SIZE,
+        class_mode='categorical',
+        subset='validation',
+        shuffle=False
+    )
+    
+    return train_generator, valid_generator, train_generator.class_indices
+
+def measure_throughput(batches, steps=None):
+    """Images per second produced by an input pipeline over a number of batches (or one full pass)"""
+    images = 0
+    start = time.perf_counter()
+    for step, (batch_images, _) in enumerate(batches):
+        if steps is not None and step >= steps:
+            break
+        images += len(batch_images)
+    return images / (time.perf_counter() - start)
+
+def benchmark_input_pipelines(steps=50, cache_dir=None):
+    """Print images/sec of the tf.data pipeline (first and cached epoch) next to the legacy generator"""
+    train_generator, _, _ = create_legacy_generators()
+    # The generator loops forever, so it is measured over a fixed number of batches
+    legacy = measure_throughput(train_generator, min(steps, len(train_generator)))
+    train_dataset, _, _ = create_tf_datasets(cache_dir=cache_dir)
+    # The first full pass decodes and fills the cache; later epochs read decoded tensors
+    first_epoch = measure_throughput(train_dataset)
+    cached = measure_throughput(train_dataset, steps)
+    print("\n=== Input Pipeline Throughput (images/sec) ===")
+    print(f"ImageDataGenerator:      {legacy:10.1f}")
+    print(f"tf.data (first epoch):   {first_epoch:10.1f}")
+    print(f"tf.data (cached epochs): {cached:10.1f}  ({cached / legacy:.1f}x the generator)")
+    return {'generator': legacy, 'tfdata_first_epoch': first_epoch, 'tfdata_cached': cached}
+
+def cpu_supports_bfloat16():
+    """True if the CPU has native bfloat16 instructions (AVX512-BF16, AMX or Arm BF16)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {'avx512_bf16', 'amx_bf16', 'bf16'})
+
+def configure_performance(threads=None, inter_op_threads=2, precision='auto'):
+    """Size TensorFlow's thread pools to the machine and pick the compute precision; call before any TF op"""
+    threads = threads or os.cpu_count()
+    # Intra-op threads parallelise each convolution; a couple of inter-op threads overlap independent ops
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(min(inter_op_threads, threads))
+    if precision == 'auto':
+        # Without native bfloat16 the casts cost more than they save
+        precision = 'mixed_bfloat16' if cpu_supports_bfloat16() else 'float32'
+    tf.keras.mixed_precision.set_global_policy(precision)
+    return {'threads': threads, 'inter_op_threads': min(inter_op_threads, threads), 'precision': precision}
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB"""
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+class ThroughputCallback(Callback):
+    """Measures training steps per second, leaving out each epoch's first (graph-building, cache-filling) step"""
+
+    def on_train_begin(self, logs=None):
+        self.steps = 0
+        self.seconds = 0.0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.last_step_end = None
+
+    def on_train_batch_end(self, batch, logs=None):
+        now = time.perf_counter()
+        if self.last_step_end is not None:
+            self.seconds += now - self.last_step_end
+            self.steps += 1
+        self.last_step_end = now
+
+    def steps_per_second(self):
+        return self.steps / self.seconds if self.seconds else 0.0
+
+def build_cnn_model(global_pooling=False):
     """Build a convolutional neural network for emotion classification"""
     model = Sequential([
         # First convolutional block
-        Conv2D(32, (3, 3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 3)),
+        Conv2D(32, (3, 3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, CHANNELS)),
         MaxPooling2D((2, 2)),
         # Second convolutional block
         Conv2D(64, (3, 3), activation='relu'),
@@ -117,11 +446,12 @@ def build_cnn_model():
         # Third convolutional block
         Conv2D(128, (3, 3), activation='relu'),
         MaxPooling2D((2, 2)),
-        # Flatten and dense layers
-        Flatten(),
+        # Flatten (or average each feature map, which shrinks the dense layer's weights 16x) and dense layers
+        GlobalAveragePooling2D() if global_pooling else Flatten(),
         Dense(128, activation='relu'),
         Dropout(0.5),  # Prevent overfitting
-        Dense(len(EMOTIONS), activation='softmax')  # Output layer for emotion classes
+        # Output layer for emotion classes; softmax stays float32 under mixed precision
+        Dense(len(EMOTIONS), activation='softmax', dtype='float32')
     ])
     
     # Compile the model
@@ -133,9 +463,10 @@ def build_cnn_model():
     
     return model
 
-def train_model(train_generator, valid_generator):
+def train_model(train_generator, valid_generator, global_pooling=False):
     """Train the CNN model with early stopping and model checkpointing"""
-    model = build_cnn_model()
+    model = build_cnn_model(global_pooling)
+    throughput = ThroughputCallback()
     
     # Define callbacks
     early_stopping = EarlyStopping(
@@ -155,21 +486,64 @@ def train_model(train_generator, valid_generator):
         train_generator,
         epochs=50,  # Maximum epochs
         validation_data=valid_generator,
-        callbacks=[early_stopping, checkpoint]
+        callbacks=[early_stopping, checkpoint, throughput]
     )
     
     # Save the final model
     model.save('emotion_model_final.h5')
+    print(f"Training speed: {throughput.steps_per_second():.2f} steps/sec "
+          f"({tf.keras.mixed_precision.global_policy().name}), peak RSS {peak_rss_mb():.0f} MB")
     
     return model, history
 
+def _benchmark_configuration(precision, global_pooling, steps, cache_dir):
+    """Train briefly with one configuration and return its speed and memory (runs in a fresh process)"""
+    settings = configure_performance(precision=precision)
+    train_data, _, _ = create_tf_datasets(cache_dir=cache_dir)
+    model = build_cnn_model(global_pooling)
+    throughput = ThroughputCallback()
+    model.fit(train_data.repeat(), epochs=1, steps_per_epoch=steps, callbacks=[throughput], verbose=0)
+    return {
+        'precision': settings['precision'],
+        'pooling': 'global-average' if global_pooling else 'flatten',
+        'threads': settings['threads'],
+        'parameters': int(model.count_params()),
+        'steps_per_sec': throughput.steps_per_second(),
+        'images_per_sec': throughput.steps_per_second() * BATCH_SIZE,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def benchmark_training(steps=50, cache_dir=None):
+    """Print steps/sec and peak RSS for float32/bfloat16 and Flatten/global-average-pooling models"""
+    precisions = ['float32'] + (['mixed_bfloat16'] if cpu_supports_bfloat16() else [])
+    # Thread pools, precision policy and peak RSS are per process, so each configuration gets its own
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for precision in precisions:
+        for global_pooling in (False, True):
+            with context.Pool(1) as pool:
+                results.append(pool.apply(_benchmark_configuration, (precision, global_pooling, steps, cache_dir)))
+    print("\n=== Training Performance ===")
+    print(f"{'precision':<16}{'pooling':<16}{'params':>10}{'steps/s':>10}{'images/s':>10}{'peak RSS MB':>13}")
+    for result in results:
+        print(f"{result['precision']:<16}{result['pooling']:<16}{result['parameters']:>10}"
+              f"{result['steps_per_sec']:>10.2f}{result['images_per_sec']:>10.1f}{result['peak_rss_mb']:>13.0f}")
+    if len(precisions) == 1:
+        print("bfloat16 skipped: this CPU has no native bfloat16 support")
+    return results
+
+def save_class_labels(class_indices, path='emotion_model_labels.json'):
+    """Save the class order the generators used (alphabetical), so inference can map outputs to emotions"""
+    with open(path, 'w') as f:
+        json.dump(class_indices, f, indent=2)
+
 def evaluate_model(model, test_generator):
     """Evaluate the model on the test set"""
     test_loss, test_accuracy = model.evaluate(test_generator)
     print(f"Test Loss: {test_loss:.4f}")
     print(f"Test Accuracy: {test_accuracy:.4f}")
 
-def main():
+def main(input_pipeline='tfdata', cache_dir=None, packed_dir=PACKED_DIR, link_mode='auto', global_pooling=False):
     """Main function to orchestrate dataset preparation and model training"""
     try:
         # Step 1: Load frame-to-emotion mappings
@@ -178,51 +552,35 @@ def main():
         
         # Step 2: Organize dataset into emotion subdirectories
         print("Organizing dataset...")
-        organize_dataset(frame_emotions)
+        organize_dataset(frame_emotions, link_mode=link_mode)
         
-        # Step 3: Create data generators
-        print("Creating data generators...")
+        # Step 3: Create the input pipelines
         # Split dataset: 80% training, 20% validation (test set can be added if needed)
-        train_datagen = ImageDataGenerator(
-            rescale=1./255,
-            rotation_range=20,
-            width_shift_range=0.2,
-            height_shift_range=0.2,
-            horizontal_flip=True,
-            validation_split=0.2  # 20% for validation
-        )
-        
-        train_generator = train_datagen.flow_from_directory(
-            DATA_DIR,
-            target_size=(IMG_SIZE, IMG_SIZE),
-            batch_size=BATCH_SIZE,
-            class_mode='categorical',
-            subset='training',
-            shuffle=True
-        )
-        
-        valid_generator = train_datagen.flow_from_directory(
-            DATA_DIR,
-            target_size=(IMG_SIZE, IMG_SIZE),
-            batch_size=BATCH_SIZE,
-            class_mode='categorical',
-            subset='validation',
-            shuffle=False
-        )
+        if input_pipeline == 'generator':
+            print("Creating data generators...")
+            train_data, valid_data, class_indices = create_legacy_generators()
+        elif input_pipeline == 'packed':
+            print(f"Reading packed shards from '{packed_dir}'...")
+            train_data, valid_data, class_indices = create_packed_datasets(packed_dir)
+        else:
+            print("Creating tf.data pipelines...")
+            train_data, valid_data, class_indices = create_tf_datasets(cache_dir=cache_dir)
         
         # Step 4: Train the model
         print("Training the model...")
-        model, history = train_model(train_generator, valid_generator)
+        model, history = train_model(train_data, valid_data, global_pooling)
+        save_class_labels(class_indices)
         
         # Step 5: Evaluate the model (using validation as test for simplicity)
         print("Evaluating the model...")
-        evaluate_model(model, valid_generator)
+        evaluate_model(model, valid_data)
         
         # Save training history
         with open('training_history.json', 'w') as f:
             json.dump(history.history, f)
         
-        print("Model training complete. Models saved as 'emotion_model_best.h5' and 'emotion_model_final.h5'")
+        print("Model training complete. Models saved as 'emotion_model_best.h5' and 'emotion_model_final.h5' "
+              "(class order in 'emotion_model_labels.json')")
         
     except Exception as e:
         print(f"ERROR: {str(e)}")
@@ -239,5 +597,33 @@ if __name__ == "__main__":
         subprocess.run(["pip3", "install", "tensorflow"], check=True)
         import tensorflow
     
-    # Run the main function
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the emotion CNN")
+    parser.add_argument("--input", choices=("tfdata", "packed", "generator"), default="tfdata",
+                        help="tf.data over image files (default), packed shards, or the legacy ImageDataGenerator")
+    parser.add_argument("--link-mode", choices=("auto", "hardlink", "reflink", "copy"), default="auto",
+                        help="how organize_dataset places frames (auto: reflink, then copy; "
+                             "hardlink only if nothing overwrites snapshots in place)")
+    parser.add_argument("--packed-dir", default=PACKED_DIR, help="packed dataset for --input packed")
+    parser.add_argument("--cache-dir", help="cache decoded images on disk instead of in memory")
+    parser.add_argument("--benchmark-input", action="store_true",
+                        help="only report input pipeline images/sec for both paths")
+    parser.add_argument("--threads", type=int, help="intra-op threads (default: all cores)")
+    parser.add_argument("--precision", choices=("auto", "float32", "mixed_bfloat16"), default="auto",
+                        help="compute precision (auto: bfloat16 mixed precision when the CPU supports it)")
+    parser.add_argument("--global-pooling", action="store_true",
+                        help="use global average pooling instead of Flatten before the dense layer")
+    parser.add_argument("--benchmark-training", action="store_true",
+                        help="only report steps/sec and peak RSS for each precision and pooling option")
+    args = parser.parse_args()
+    
+    if args.benchmark_training:
+        # Each configuration sets up TensorFlow in its own process
+        benchmark_training(cache_dir=args.cache_dir)
+    else:
+        print(f"Performance settings: {configure_performance(args.threads, precision=args.precision)}")
+        if args.benchmark_input:
+            benchmark_input_pipelines(cache_dir=args.cache_dir)
+        else:
+            # Run the main function
+            main(input_pipeline=args.input, cache_dir=args.cache_dir, packed_dir=args.packed_dir,
+                 link_mode=args.link_mode, global_pooling=args.global_pooling)
\ No newline at end of file